@@ -0,0 +1,311 @@
+"""
+도장 일괄 생성 (명령줄).
+
+CSV(머리글 행 필수) 또는 JSONL(한 줄에 객체 하나)에서 도장 입력값을 한 행씩 읽어
+프로세스 풀에서 렌더링하고, 결과를 ZIP / tar 묶음이나 폴더에 바로 씁니다 (중간 임시 파일 없음).
+입력 전체를 메모리에 올리지 않으며, 처리 중인 행 수를 --queue 로 제한해 읽기가 렌더링을 앞지르지 않습니다.
+행마다의 오류는 표준 오류로 알리고 나머지 행은 계속 처리합니다.
+
+    python stamp_batch.py 직원명단.csv -o 도장.zip
+    python stamp_batch.py 직원명단.jsonl -o out/ --workers 8 --mode P
+
+열(키) 이름 (text 외에는 생략 가능, 생략하면 StampSpec 기본값):
+    text, file, font(폰트 파일 경로 또는 목록의 표시 이름), font_size, size("400x400") 또는 width/height,
+    stamp_type, sub_shape, direction, line_count, line_spacing("좁게"/"보통"/"넉넉" 또는 배율), color, rotate_glyphs,
+    ink_effect(0~1, 잉크/닳음 효과), ink_seed(생략하면 text 로 정해지는 값이라 같은 이름은 항상 같은 무늬)
+font_size(1~150), line_count(1~6), line_spacing(0.5~3.0 배)이 범위를 벗어나면 그 행은 오류로 알립니다.
+"""
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+import tarfile
+import time
+import zipfile
+import zlib
+
+from stamp_export import PNG_MODES, atomic_write, encode_raster, mask_to_image
+from stamp_fonts import get_coverage, get_font
+from stamp_registry import get_font_registry
+from stamp_render import (
+    LINE_SPACINGS, STAMP_TYPES, TEXT_DIRECTIONS, StampSpec, check_spec_ranges, fonts, parse_font_size,
+    parse_size, render_mask,
+)
+
+# 프로세스 하나당 처리 중으로 둘 수 있는 행 수 (전체 = workers x 이 값)
+QUEUE_PER_WORKER = 4
+FONT_NAMES = {name: path for path, name in fonts}
+TRUE_WORDS = ("1", "true", "yes", "y", "예")
+
+# --- 입력 읽기 ---
+def read_rows(file_path, fmt=None):
+    """
+    (행 번호, dict) 를 차례로 내놓습니다. 형식은 fmt("csv"/"jsonl"), 없으면 확장자로 판단.
+    JSONL 의 잘못된 줄은 dict 대신 ValueError 를 내놓고 다음 줄로 넘어갑니다.
+    """
+    if fmt is None:
+        ext = os.path.splitext(file_path)[1].lower()
+        fmt = "jsonl" if ext in (".jsonl", ".ndjson") else "csv"
+    # utf-8-sig: 엑셀에서 저장한 CSV 의 BOM 제거
+    with open(file_path, encoding="utf-8-sig", newline="") as f:
+        if fmt == "csv":
+            reader = csv.DictReader(f)
+            for row in reader:
+                yield reader.line_num, row
+            return
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+                if not isinstance(row, dict):
+                    raise ValueError("JSON 객체가 아닙니다")
+            except ValueError as e:
+                yield line_no, ValueError(f"JSON 해석 실패: {e}")
+                continue
+            yield line_no, row
+
+def _field(row, key):
+    value = row.get(key)
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+def resolve_font(value, allow_paths=False):
+    """
+    fonts 목록이나 폰트 레지스트리의 표시 이름 -> 경로.
+    allow_paths: 폰트 파일 경로도 받음 (명령줄 전용. 서버처럼 외부 입력을 받는 곳에서는 끔)
+    """
+    if value in FONT_NAMES:
+        return FONT_NAMES[value]
+    for entry in get_font_registry().entries():
+        if entry.label == value:
+            return entry.path
+    if allow_paths and os.path.exists(value):
+        return value
+    raise ValueError(f"폰트를 찾을 수 없습니다: {value}")
+
+def spec_from_row(row, allow_paths=False):
+    """
+    입력 한 행 -> (저장할 파일 이름(확장자 제외), StampSpec). 값이 잘못되면 ValueError
+    allow_paths: font 열에 폰트 파일 경로도 허용 (resolve_font 참고)
+    """
+    text = _field(row, "text")
+    if not text:
+        raise ValueError("text 가 비어 있습니다")
+    values = {"text": text}
+    font = _field(row, "font")
+    if font:
+        values["font_path"] = resolve_font(font, allow_paths)
+    if _field(row, "font_size"):
+        values["font_size"] = parse_font_size(_field(row, "font_size"))
+    if _field(row, "size"):
+        values["width"], values["height"] = parse_size(_field(row, "size"))
+    elif _field(row, "width") or _field(row, "height"):
+        values["width"], values["height"] = parse_size("사용자 지정", _field(row, "width") or "",
+                                                       _field(row, "height") or "")
+    stamp_type = _field(row, "stamp_type")
+    if stamp_type:
+        if stamp_type not in STAMP_TYPES:
+            raise ValueError(f"알 수 없는 도장 종류: {stamp_type}")
+        values["stamp_type"] = stamp_type
+    direction = _field(row, "direction")
+    if direction:
+        if direction not in TEXT_DIRECTIONS:
+            raise ValueError(f"알 수 없는 글자 방향: {direction}")
+        values["direction"] = direction
+    if _field(row, "sub_shape"):
+        values["sub_shape"] = _field(row, "sub_shape")
+    if _field(row, "line_count"):
+        values["line_count"] = int(_field(row, "line_count"))
+    spacing = _field(row, "line_spacing")
+    if spacing:
+        values["line_spacing"] = LINE_SPACINGS[spacing] if spacing in LINE_SPACINGS else float(spacing)
+    if _field(row, "color"):
+        values["color"] = _field(row, "color")
+    if _field(row, "rotate_glyphs"):
+        values["rotate_glyphs"] = _field(row, "rotate_glyphs").lower() in TRUE_WORDS
+    if _field(row, "ink_effect"):
+        values["ink_effect"] = min(1.0, max(0.0, float(_field(row, "ink_effect"))))
+        seed = _field(row, "ink_seed")
+        # 재실행해도 결과가 같도록 seed 를 생략하면 이름에서 정함
+        values["ink_seed"] = int(seed) if seed else zlib.crc32(text.encode("utf-8"))
+    spec = StampSpec(**values)
+    # 잘못된 행이 이상한 도장으로 조용히 만들어지지 않도록 GUI 범위 밖 값은 행 오류로
+    check_spec_ranges(spec)
+    return _field(row, "file") or text, spec
+
+# --- 작업 프로세스 ---
+def _init_worker(font_paths):
+    """프로세스마다 한 번: 폰트 파일과 글자 지원 표를 미리 읽어 둠"""
+    for path in font_paths:
+        if os.path.exists(path):
+            get_coverage(path)
+            get_font(path, StampSpec._field_defaults["font_size"])
+
+def render_encoded(spec, fmt="PNG", mode="RGBA", compress_level=6, scale=1.0):
+    """spec 을 렌더링해 인코딩한 파일 내용 (bytes, 빈 네모로 그린 글자)"""
+    mask = render_mask(spec, scale)
+    img = mask_to_image(mask, spec.color, mode if fmt == "PNG" else "RGBA")
+    return encode_raster(img, fmt, compress_level), mask.info.get("missing_glyphs", "")
+
+# --- 결과 쓰기 ---
+class DirectorySink:
+    def __init__(self, path):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+
+    def write(self, name, data):
+        with atomic_write(os.path.join(self.path, name)) as f:
+            f.write(data)
+
+    def close(self):
+        pass
+
+class ZipSink:
+    def __init__(self, path):
+        self._zip = zipfile.ZipFile(path, "w")
+
+    def write(self, name, data):
+        # PNG/WebP 는 이미 압축되어 있으므로 저장만 함
+        self._zip.writestr(zipfile.ZipInfo(name, time.localtime()[:6]), data, zipfile.ZIP_STORED)
+
+    def close(self):
+        self._zip.close()
+
+class TarSink:
+    def __init__(self, path):
+        gz = path.lower().endswith((".tar.gz", ".tgz"))
+        self._tar = tarfile.open(path, "w:gz" if gz else "w")
+
+    def write(self, name, data):
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mtime = int(time.time())
+        info.mode = 0o644
+        self._tar.addfile(info, io.BytesIO(data))
+
+    def close(self):
+        self._tar.close()
+
+def open_sink(path):
+    """출력 경로의 모양(.zip / .tar / .tar.gz / .tgz / 그 외 폴더)에 맞는 저장소"""
+    lower = path.lower()
+    if lower.endswith(".zip"):
+        return ZipSink(path)
+    if lower.endswith((".tar", ".tar.gz", ".tgz")):
+        return TarSink(path)
+    return DirectorySink(path)
+
+def _unique_name(name, ext, used):
+    """파일 이름에 쓸 수 없는 문자를 바꾸고, 겹치면 _2, _3 ... 을 붙입니다."""
+    base = "".join("_" if c in '\\/:*?"<>|' else c for c in name).strip() or "stamp"
+    candidate = base + ext
+    n = 1
+    while candidate in used:
+        n += 1
+        candidate = f"{base}_{n}{ext}"
+    used.add(candidate)
+    return candidate
+
+# --- 실행 ---
+def run_batch(rows, sink, workers=None, queue_size=None, fmt="PNG", mode="RGBA", compress_level=6,
+              scale=1.0, on_error=None, progress=None):
+    """
+    rows: read_rows() 가 내놓는 (행 번호, dict) 들. 결과는 sink.write(이름, 내용) 으로 씁니다.
+    on_error(행 번호, 메시지), progress(완료 행 수, 실패 행 수) 는 주 프로세스에서 호출됩니다.
+    (빈 네모로 그린 글자가 있는 행은 저장하고 on_error 로 경고만 알림)
+    반환: (성공 수, 실패 수)
+    """
+    workers = workers or os.cpu_count() or 1
+    queue_size = queue_size or workers * QUEUE_PER_WORKER
+    ext = ".webp" if fmt == "WEBP" else ".png"
+    used = set()
+    ok = failed = 0
+    pending = {}
+
+    def fail(line_no, message):
+        nonlocal failed
+        failed += 1
+        if on_error is not None:
+            on_error(line_no, message)
+
+    def collect():
+        """하나 이상 끝날 때까지 기다렸다가 끝난 결과를 씀"""
+        nonlocal ok
+        done, _ = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            line_no, name = pending.pop(future)
+            try:
+                data, missing = future.result()
+            except Exception as e:
+                fail(line_no, f"렌더링 실패: {e}")
+                continue
+            sink.write(name, data)
+            ok += 1
+            if missing and on_error is not None:
+                on_error(line_no, f"경고: 지원하는 폰트가 없어 빈 네모로 그린 글자 {missing} ({name})")
+        if progress is not None:
+            progress(ok, failed)
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=([path for path, _ in fonts],)) as pool:
+        for line_no, row in rows:
+            if isinstance(row, Exception):
+                fail(line_no, str(row))
+                continue
+            try:
+                name, spec = spec_from_row(row, allow_paths=True)
+            except (ValueError, KeyError) as e:
+                fail(line_no, f"입력값 오류: {e}")
+                continue
+            # 처리 중인 행이 가득 차면 하나 이상 끝날 때까지 입력 읽기를 멈춤
+            while len(pending) >= queue_size:
+                collect()
+            future = pool.submit(render_encoded, spec, fmt, mode, compress_level, scale)
+            pending[future] = (line_no, _unique_name(name, ext, used))
+        while pending:
+            collect()
+    return ok, failed
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CSV/JSONL 에서 도장 일괄 생성")
+    parser.add_argument("input", help="입력 파일 (.csv 또는 .jsonl)")
+    parser.add_argument("-o", "--out", required=True, help="출력 (.zip, .tar, .tar.gz 또는 폴더)")
+    parser.add_argument("--input-format", choices=("csv", "jsonl"), help="입력 형식 (기본: 확장자로 판단)")
+    parser.add_argument("--format", choices=("png", "webp"), default="png", help="이미지 형식")
+    parser.add_argument("--mode", choices=PNG_MODES, default="RGBA", help="PNG 색상 모드")
+    parser.add_argument("--compress-level", type=int, default=6, choices=range(10), metavar="0-9")
+    parser.add_argument("--scale", type=float, default=1.0, help="렌더링 배율")
+    parser.add_argument("--workers", type=int, help="작업 프로세스 수 (기본: CPU 수)")
+    parser.add_argument("--queue", type=int, help="동시에 처리 중으로 둘 최대 행 수 (기본: 작업 수 x 4)")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.input):
+        parser.error(f"입력 파일이 없습니다: {args.input}")
+
+    def on_error(line_no, message):
+        print(f"\n{line_no}행: {message}", file=sys.stderr)
+
+    def progress(ok, failed):
+        print(f"\r완료 {ok}  실패 {failed}", end="", file=sys.stderr, flush=True)
+
+    started = time.perf_counter()
+    sink = open_sink(args.out)
+    try:
+        ok, failed = run_batch(read_rows(args.input, args.input_format), sink, args.workers, args.queue,
+                               args.format.upper(), args.mode, args.compress_level, args.scale,
+                               on_error, progress)
+    finally:
+        sink.close()
+    elapsed = time.perf_counter() - started
+    print(file=sys.stderr)
+    print(f"{ok}개 저장, {failed}개 실패, {elapsed:.1f}초 ({ok / elapsed if elapsed else 0:.1f}개/초) -> {args.out}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,258 @@
+"""
+렌더링 벤치마크.
+
+STAMP_TYPES x SUB_STAMP_SHAPES x TEXT_DIRECTIONS x 줄 수 x 줄간격 x 크기 x 이름 길이 조합을
+Tk 없이 렌더링하며 조합마다 소요 시간, 메모리 최대치, 초당 렌더링 수를 잽니다.
+해당 도장 종류에서 쓰이지 않는 값만 다른 조합은 layout_key() 로 합쳐 한 번만 잽니다.
+
+    python stamp_bench.py --out bench.json
+    python stamp_bench.py --quick --baseline bench.json --threshold 0.2
+    python stamp_bench.py --verify
+
+--verify 는 시간 대신 최적화가 결과를 바꾸지 않았는지(띠 단위 출력 = 전체 렌더링, 회전 맞춤 크기 등) 확인합니다.
+"""
+from itertools import product
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+
+import PIL
+
+from PIL import ImageChops
+
+from stamp_export import STRIP_HEIGHT
+from stamp_fonts import clear_atlas, clear_font_cache
+from stamp_render import (
+    LINE_SPACINGS, STAMP_TYPES, SUB_STAMP_SHAPES, TEXT_DIRECTIONS, StampSpec,
+    RING_SHAPES, canvas_size, clear_layout_cache, clear_raster_stages, fit_font_size, fonts, layout_key,
+    render_mask, render_mask_region, render_stamp,
+)
+
+# 이름은 이 문자열의 앞부분을 잘라 씀 (글자가 겹치지 않아 글자 캐시 효과가 과장되지 않음)
+SAMPLE_TEXT = "가나다라마바사아자차카타파하거너더러머버서어저처커터퍼허고노도로모보소오조초코토포호"
+NAME_LENGTHS = (2, 4, 10, 20, 40)
+SIZES = ((200, 200), (400, 400), (600, 450), (1200, 1200), (2000, 2000))
+LINE_COUNTS = tuple(range(1, 7))
+QUICK_NAME_LENGTHS = (2, 10)
+QUICK_SIZES = ((200, 200), (400, 400))
+
+def bench_specs(font_path, sizes=SIZES, name_lengths=NAME_LENGTHS, rotate=(False, True)):
+    """
+    측정할 (이름, StampSpec) 목록. 배치 결과가 같은 조합(layout_key 가 같은 것)은 하나만 남깁니다.
+    이름은 "도장종류/서브모양/방향/줄수/줄간격/회전/WxH/글자수" 형식으로, 기준 결과와 비교할 때 키로 씁니다.
+    """
+    seen = set()
+    specs = []
+    for stamp_type, sub, direction, lines, (spacing_name, spacing), rot, (w, h), n in product(
+            STAMP_TYPES, SUB_STAMP_SHAPES, TEXT_DIRECTIONS, LINE_COUNTS, LINE_SPACINGS.items(),
+            rotate, sizes, name_lengths):
+        spec = StampSpec(SAMPLE_TEXT[:n], font_path, 80, w, h, stamp_type, sub, direction,
+                         lines, spacing, rotate_glyphs=rot)
+        # 직사각형 계열은 세로 크기를 가로에서 정하므로 같은 캔버스가 되는 조합도 합침
+        key = (layout_key(spec), canvas_size(spec))
+        if key in seen:
+            continue
+        seen.add(key)
+        k = layout_key(spec)
+        name = "/".join([stamp_type, k.sub_shape or "-", k.direction or "-", str(k.line_count),
+                         spacing_name if k.line_count > 1 or stamp_type == "문자 to 도장모양" else "-",
+                         "회전" if k.rotate_glyphs else "-", f"{w}x{h}", str(n)])
+        specs.append((name, spec))
+    return specs
+
+def measure(spec, repeat=3, cold=False):
+    """
+    spec 을 repeat 번 렌더링한 결과.
+    배치/단계별 래스터 캐시는 매번 비우고(측정 전 한 번은 예열), cold 면 폰트/글자 마스크 캐시까지 비워
+    처음 렌더링하는 비용을 잽니다.
+    peak_kb 는 tracemalloc 으로 잰 파이썬 힙 최대치(별도 1회)이고, image_kb 는 결과 이미지 버퍼 크기입니다.
+    """
+    times = []
+    img = None
+    if not cold:
+        # 처음 한 번은 폰트 로딩/모듈 import 같은 일회성 비용이 섞이므로 재지 않음
+        render_stamp(spec)
+    for _ in range(repeat):
+        clear_layout_cache()
+        clear_raster_stages()
+        if cold:
+            clear_font_cache()
+            clear_atlas()
+        t = time.perf_counter()
+        img = render_stamp(spec)
+        times.append(time.perf_counter() - t)
+
+    clear_layout_cache()
+    clear_raster_stages()
+    tracemalloc.start()
+    try:
+        render_stamp(spec)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    mean = sum(times) / len(times)
+    return {
+        "wall_ms": round(mean * 1000, 3),
+        "min_ms": round(min(times) * 1000, 3),
+        "renders_per_sec": round(1 / mean, 1) if mean > 0 else None,
+        "peak_kb": round(peak / 1024, 1),
+        "image_kb": round(img.width * img.height * len(img.getbands()) / 1024, 1),
+    }
+
+def run(specs, repeat=3, cold=False, progress=None):
+    results = {}
+    for i, (name, spec) in enumerate(specs):
+        try:
+            results[name] = measure(spec, repeat, cold)
+        except ValueError as e:
+            results[name] = {"error": str(e)}
+        if progress is not None:
+            progress(i + 1, len(specs), name)
+    return results
+
+def compare(results, baseline, threshold=0.2):
+    """
+    baseline 보다 wall_ms 가 (1 + threshold) 배를 넘게 느려진 조합 목록 [(이름, 기준 ms, 현재 ms), ...]
+    너무 짧은 측정(1ms 미만)은 잡음이 커서 건너뜁니다.
+    """
+    regressions = []
+    for name, cur in results.items():
+        base = baseline.get(name)
+        if not base or "wall_ms" not in base or "wall_ms" not in cur:
+            continue
+        if max(base["wall_ms"], cur["wall_ms"]) < 1.0:
+            continue
+        if cur["wall_ms"] > base["wall_ms"] * (1 + threshold):
+            regressions.append((name, base["wall_ms"], cur["wall_ms"]))
+    regressions.sort(key=lambda r: r[2] / r[1], reverse=True)
+    return regressions
+
+# --- 결과 검증 (--verify) ---
+# 띠 경계가 소수 좌표에 걸리는 배율 (600dpi 인쇄 배율 포함)
+VERIFY_SCALES = (2.37, 3.543)
+
+def check_strips(font_path, scales=VERIFY_SCALES, strip_height=STRIP_HEIGHT):
+    """띠(render_mask_region)로 나눠 그린 결과가 render_mask 와 픽셀 단위로 같은지. 실패 설명 목록"""
+    try:
+        import numpy  # noqa: F401
+        inks = (0.0, 0.6)
+    except ImportError:
+        inks = (0.0,)
+    failures = []
+    for (stamp_type, sub), lines, ink, scale in product(
+            (("원형", "원"), ("엣지 있는 직사각형", "원"), ("직사각형", "원"), ("문자 to 도장모양", "원")),
+            (1, 3), inks, scales):
+        spec = StampSpec(SAMPLE_TEXT[:4], font_path, 80, 400, 400, stamp_type, sub, TEXT_DIRECTIONS[0],
+                         lines, 1.0, ink_effect=ink)
+        full = render_mask(spec, scale)
+        width, height = full.size
+        stitched = full.copy()
+        for top in range(0, height, strip_height):
+            bottom = min(height, top + strip_height)
+            stitched.paste(render_mask_region(spec, (0, top, width, bottom), scale), (0, top))
+        bbox = ImageChops.difference(stitched, full).getbbox()
+        if bbox:
+            failures.append(f"띠 출력 != 전체 렌더링: {stamp_type}/{sub}/{lines}줄/잉크 {ink} x{scale} {bbox}")
+    return failures
+
+# 글자를 돌린 둘레 배치가 돌리지 않은 배치보다 이 비율 넘게 작아지면 실패
+ROTATED_FIT_RATIO = 0.85
+
+def check_rotated_fit(font_path):
+    """여러 줄 둘레 배치에서 글자를 돌려도 자동 맞춤 크기가 돌리지 않은 크기와 비슷한지"""
+    failures = []
+    for (n, lines), shape in product(((29, 3), (18, 2), (10, 1)), RING_SHAPES):
+        plain = fit_font_size(SAMPLE_TEXT[:n], font_path, 80, 400, 400, shape, lines)
+        rotated = fit_font_size(SAMPLE_TEXT[:n], font_path, 80, 400, 400, shape, lines, rotate=True)
+        if rotated < plain * ROTATED_FIT_RATIO:
+            failures.append(f"회전 맞춤 크기 {rotated}px < 회전 없음 {plain}px: {shape}/{lines}줄/{n}자")
+    return failures
+
+VERIFY_CHECKS = (check_strips, check_rotated_fit)
+
+def verify(font_path):
+    failures = []
+    for check in VERIFY_CHECKS:
+        failures.extend(check(font_path))
+    return failures
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="도장 렌더링 벤치마크")
+    parser.add_argument("--font", default=fonts[0][0], help="측정에 쓸 폰트 파일")
+    parser.add_argument("--repeat", type=int, default=3, help="조합마다 반복 횟수")
+    parser.add_argument("--quick", action="store_true", help="작은 크기/짧은 이름만 (빠른 확인용)")
+    parser.add_argument("--cold", action="store_true", help="매번 폰트/글자 마스크 캐시까지 비움")
+    parser.add_argument("--match", default="", help="이름에 이 문자열이 들어간 조합만")
+    parser.add_argument("--out", help="결과 JSON 파일")
+    parser.add_argument("--baseline", help="비교할 기준 결과 JSON 파일")
+    parser.add_argument("--threshold", type=float, default=0.2, help="회귀로 볼 느려짐 비율 (0.2 = 20%%)")
+    parser.add_argument("--verify", action="store_true", help="시간 대신 렌더링 결과 검증만")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.font):
+        parser.error(f"폰트 파일이 없습니다: {args.font} (--font 로 지정)")
+
+    if args.verify:
+        failures = verify(args.font)
+        for failure in failures:
+            print(f"  {failure}")
+        print(f"검증 실패 {len(failures)}건" if failures else "검증 통과")
+        return 1 if failures else 0
+
+    if args.quick:
+        specs = bench_specs(args.font, QUICK_SIZES, QUICK_NAME_LENGTHS)
+    else:
+        specs = bench_specs(args.font)
+    if args.match:
+        specs = [(name, spec) for name, spec in specs if args.match in name]
+
+    def progress(done, total, name):
+        print(f"\r[{done}/{total}] {name}".ljust(80), end="", file=sys.stderr, flush=True)
+
+    started = time.perf_counter()
+    results = run(specs, args.repeat, args.cold, progress)
+    elapsed = time.perf_counter() - started
+    print(file=sys.stderr)
+
+    timed = [r for r in results.values() if "wall_ms" in r]
+    total_ms = sum(r["wall_ms"] for r in timed)
+    slowest = sorted(((r["wall_ms"], name) for name, r in results.items() if "wall_ms" in r), reverse=True)
+    print(f"조합 {len(results)}개, 총 {elapsed:.1f}초, 렌더링 1회 평균 {total_ms / max(1, len(timed)):.2f}ms")
+    for ms, name in slowest[:10]:
+        print(f"  {ms:9.2f}ms  {name}")
+
+    if args.out:
+        report = {
+            "meta": {
+                "python": platform.python_version(),
+                "pillow": PIL.__version__,
+                "platform": platform.platform(),
+                "font": os.path.basename(args.font),
+                "repeat": args.repeat,
+                "cold": args.cold,
+                "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            },
+            "results": results,
+        }
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=1)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"회귀 {len(regressions)}건 (기준 대비 {args.threshold:.0%} 초과):")
+            for name, base_ms, cur_ms in regressions[:20]:
+                print(f"  {name}: {base_ms:.2f}ms -> {cur_ms:.2f}ms ({cur_ms / base_ms - 1:+.0%})")
+            return 1
+        print("회귀 없음")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,266 @@
+"""
+렌더링 결과 캐시.
+
+같은 도장을 하루에도 여러 번 다시 만드는 경우가 많으므로, 완성된 이미지를
+메모리 LRU(1단계)와 내용 주소 기반 디스크 저장소(2단계)에 보관합니다.
+보관하는 것은 색을 입히기 전의 "L" 마스크(픽셀당 1바이트)이고, 색은 꺼낼 때 입힙니다.
+키는 색을 뺀 렌더링 입력값(StampSpec + 폰트/대체 폰트 파일 수정 시각/크기 + 배율)의 해시이므로
+색만 바꾼 도장은 캐시에서 바로 나옵니다.
+render_mask() 가 돌려준 마스크는 여러 곳에서 공유되므로 수정하지 말고, 필요하면 copy() 해서 사용합니다.
+"""
+from collections import OrderedDict
+from threading import Lock
+import hashlib
+import json
+import os
+import sys
+import uuid
+
+from PIL import Image
+
+from stamp_render import colorize, render_mask
+from stamp_trace import span
+
+MEMORY_CACHE_BYTES = 64 * 1024 * 1024
+DISK_CACHE_BYTES = 256 * 1024 * 1024
+# 디스크가 상한을 넘으면 이 비율까지 줄임 (넣을 때마다 다시 넘어 전체를 훑지 않도록 여유를 둠)
+DISK_CACHE_LOW_WATER = 0.9
+# 키/저장 형식이나 렌더링 결과가 바뀌면 올려서 예전 디스크 캐시를 무시
+CACHE_VERSION = 5
+
+def default_cache_dir():
+    """STAMP_CACHE_DIR 환경변수, 없으면 OS 별 사용자 캐시 폴더 아래 CreateStamp"""
+    env = os.environ.get("STAMP_CACHE_DIR")
+    if env:
+        return env
+    if sys.platform.startswith('win'):
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+    elif sys.platform == 'darwin':
+        base = os.path.expanduser("~/Library/Caches")
+    else:
+        base = os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache")
+    return os.path.join(base, "CreateStamp")
+
+def font_signature(font_path):
+    """폰트 파일이 바뀌면 키도 바뀌도록 (수정 시각, 크기) 를 사용"""
+    try:
+        st = os.stat(font_path)
+        return st.st_mtime_ns, st.st_size
+    except OSError:
+        return 0, 0
+
+def spec_hash(spec, scale=1.0):
+    """spec 의 정규화된 내용 해시 (sha256 hex). 마스크에는 색이 없으므로 color 는 제외"""
+    payload = {
+        "v": CACHE_VERSION,
+        "spec": list(spec._replace(color="")),
+        # 대체 폰트 파일이 바뀌어도 그 글자들이 달라지므로 모두 키에 넣음
+        "fonts": [font_signature(path) for path in (spec.font_path, *spec.fallback_fonts)],
+        "scale": round(float(scale), 6),
+    }
+    data = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+class RenderCache:
+    """
+    메모리 LRU + 디스크 저장소 2단 캐시. 스레드 안전합니다.
+    cache_dir 가 None 이면 디스크 단계를 쓰지 않습니다.
+    """
+
+    def __init__(self, cache_dir=None, memory_bytes=MEMORY_CACHE_BYTES, disk_bytes=DISK_CACHE_BYTES):
+        self.cache_dir = cache_dir
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self._memory = OrderedDict()
+        self._memory_used = 0
+        self._lock = Lock()
+        self._evicting = False
+        # 디스크 사용량은 시작할 때 한 번만 세고 이후에는 넣고 지울 때 더하고 뺌
+        self._disk_used = sum(e[1] for e in self._disk_entries()) if cache_dir is not None else 0
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0}
+
+    def _count(self, name):
+        # 서버처럼 여러 스레드가 동시에 부르므로 잠금 안에서 셈
+        with self._lock:
+            self.stats[name] += 1
+
+    def stats_snapshot(self):
+        with self._lock:
+            return dict(self.stats)
+
+    # --- 1단계: 메모리 ---
+    def _memory_get(self, key):
+        with self._lock:
+            img = self._memory.get(key)
+            if img is not None:
+                self._memory.move_to_end(key)
+            return img
+
+    def _memory_put(self, key, img):
+        size = len(img.getbands()) * img.width * img.height
+        with self._lock:
+            if key in self._memory:
+                return
+            self._memory[key] = img
+            self._memory_used += size
+            while self._memory_used > self.memory_bytes and len(self._memory) > 1:
+                _, old = self._memory.popitem(last=False)
+                self._memory_used -= len(old.getbands()) * old.width * old.height
+
+    # --- 2단계: 디스크 ---
+    # 파일 형식: JSON 헤더 한 줄(모드, 크기, info) + 압축하지 않은 픽셀 바이트.
+    # PNG 디코딩 없이 읽기 한 번과 frombuffer 만으로 복원되므로 재시작 후에도 1ms 이내로 돌아옵니다.
+    def _disk_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + ".stamp")
+
+    def _disk_get(self, key):
+        if self.cache_dir is None:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+            header_end = data.index(b"\n")
+            header = json.loads(data[:header_end])
+            img = Image.frombuffer(header["mode"], tuple(header["size"]), data[header_end + 1:],
+                                   "raw", header["mode"], 0, 1)
+            os.utime(path)  # 최근 사용 표시 (제거 순서용)
+        except (OSError, ValueError, KeyError):
+            return None
+        img.info.update(header.get("info", {}))
+        return img
+
+    def _disk_put(self, key, img):
+        if self.cache_dir is None:
+            return
+        path = self._disk_path(key)
+        header = {"mode": img.mode, "size": list(img.size),
+                  "info": {k: v for k, v in img.info.items() if isinstance(v, (int, float, str))}}
+        data = json.dumps(header).encode("utf-8") + b"\n" + img.tobytes()
+        # 다른 스레드/프로세스가 반쯤 쓴 파일을 읽지 않도록 임시 파일에 쓴 뒤 교체
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(tmp, "wb") as f:
+                f.write(data)
+            try:
+                replaced = os.path.getsize(path)
+            except OSError:
+                replaced = 0
+            os.replace(tmp, path)
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return
+        with self._lock:
+            self._disk_used += len(data) - replaced
+            need_evict = self._disk_used > self.disk_bytes and not self._evicting
+            if need_evict:
+                self._evicting = True
+        if need_evict:
+            try:
+                self._evict_disk()
+            finally:
+                with self._lock:
+                    self._evicting = False
+
+    def _disk_entries(self):
+        """디스크 저장소의 [(마지막 사용 시각, 크기, 경로), ...]"""
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(".stamp"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    def _evict_disk(self):
+        """가장 오래 쓰지 않은 파일부터 지워 전체 크기를 상한의 DISK_CACHE_LOW_WATER 배까지 줄임"""
+        entries = self._disk_entries()
+        # 다른 프로세스가 같은 폴더에 쓴 파일도 반영되도록 실제 크기로 다시 맞춤
+        total = sum(e[1] for e in entries)
+        target = self.disk_bytes * DISK_CACHE_LOW_WATER
+        entries.sort()
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+        with self._lock:
+            self._disk_used = total
+
+    # --- 공개 API ---
+    def get_mask(self, spec, scale=1.0):
+        """캐시에 있으면 마스크, 없으면 None"""
+        key = spec_hash(spec, scale)
+        img = self._memory_get(key)
+        if img is not None:
+            self._count("memory_hits")
+            return img
+        img = self._disk_get(key)
+        if img is not None:
+            self._count("disk_hits")
+            self._memory_put(key, img)
+        return img
+
+    def get(self, spec, scale=1.0):
+        """캐시에 있으면 spec.color 를 입힌 RGBA 이미지, 없으면 None"""
+        mask = self.get_mask(spec, scale)
+        return None if mask is None else colorize(mask, spec.color)
+
+    def render_mask(self, spec, scale=1.0):
+        """마스크를 캐시에서 찾고, 없으면 렌더링해서 두 단계 모두에 저장한 뒤 돌려줍니다."""
+        with span("cache_lookup"):
+            key = spec_hash(spec, scale)
+            img = self._memory_get(key)
+            if img is not None:
+                self._count("memory_hits")
+                return img
+            img = self._disk_get(key)
+        if img is not None:
+            self._count("disk_hits")
+        else:
+            self._count("misses")
+            img = render_mask(spec, scale)
+            with span("cache_store"):
+                self._disk_put(key, img)
+        self._memory_put(key, img)
+        return img
+
+    def render(self, spec, scale=1.0):
+        """render_stamp 와 같은 결과를 캐시된 마스크에 색을 입혀 돌려줍니다."""
+        return colorize(self.render_mask(spec, scale), spec.color)
+
+    def clear_memory(self):
+        with self._lock:
+            self._memory.clear()
+            self._memory_used = 0
+
+_default_cache = None
+_default_cache_lock = Lock()
+
+def get_render_cache():
+    """기본 캐시 (사용자 캐시 폴더의 디스크 저장소 포함)"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = RenderCache(default_cache_dir())
+        return _default_cache
+
+def cached_render_stamp(spec, scale=1.0):
+    """render_stamp 와 같지만 기본 캐시를 거칩니다."""
+    return get_render_cache().render(spec, scale)
+
+def cached_render_mask(spec, scale=1.0):
+    """render_mask 와 같지만 기본 캐시를 거칩니다. 돌려받은 마스크는 수정하지 마세요."""
+    return get_render_cache().render_mask(spec, scale)
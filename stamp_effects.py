@@ -0,0 +1,157 @@
+"""
+잉크/닳음 효과 (실제로 찍은 듯한 도장).
+
+렌더링한 "L" 마스크(=알파)에 다음을 NumPy 배열 연산으로 적용합니다.
+  고르지 않은 잉크: 저주파 노이즈만큼 농도를 낮춤
+  닳은 가장자리:   침식(최소 필터)한 마스크와의 차이(가장자리 띠) 중 일부를 깎음
+  얼룩(speckle):   잉크 안쪽에 작은 빈 점
+  번짐:            흐린 마스크를 옅게 바깥으로 겹침
+
+노이즈 텍스처는 캔버스 크기별로 한 번만 만들어 캐시하고(가로/세로로 이어지는 주기 텍스처),
+seed 마다 그 텍스처를 다른 위치에서 읽어 무늬를 바꿉니다 (seed 가 바뀌어도 새로 만들지 않음).
+원본 캔버스 좌표 기준이므로 같은 seed 면 미리보기/저장/인쇄용(띠 단위) 어느 배율로 그려도 같은 무늬가 나옵니다.
+NumPy 는 이 효과를 켤 때만 필요합니다.
+"""
+from functools import lru_cache
+
+from PIL import Image
+
+# 노이즈 텍스처 캐시 개수 (캔버스 크기별. 4000x4000 이면 한 개에 약 192MB)
+NOISE_CACHE_SIZE = 4
+# 저주파(잉크 농도) / 중간(얼룩) 노이즈의 격자 간격 (원본 캔버스 픽셀)
+INK_NOISE_CELL = 24
+SPECKLE_NOISE_CELL = 3
+# 모든 캔버스 크기가 공유하는 텍스처 생성 seed (도장마다의 seed 는 읽는 위치만 바꿈)
+BASE_NOISE_SEED = 0
+
+def _numpy():
+    try:
+        import numpy
+    except ImportError:
+        raise RuntimeError("잉크 효과에는 NumPy 가 필요합니다. (pip install numpy)")
+    return numpy
+
+def _periodic_noise(rng, width, height, cell):
+    """cell 간격 격자 노이즈를 부드럽게 키운 주기 텍스처 (크기는 width, height 를 cell 단위로 올림)"""
+    np = _numpy()
+    gw, gh = -(-width // cell), -(-height // cell)
+    small = rng.random((gh, gw), dtype=np.float32)
+    if cell == 1:
+        return small
+    # 양 끝을 반대쪽 값으로 이어 붙인 뒤 키우면 이음새 없이 반복됨 (BICUBIC 은 격자 2칸까지 참조)
+    padded = np.pad(small, 2, mode="wrap")
+    big = Image.fromarray(padded, "F").resize(((gw + 4) * cell, (gh + 4) * cell), Image.BICUBIC)
+    return np.asarray(big)[2 * cell:(gh + 2) * cell, 2 * cell:(gw + 2) * cell]
+
+@lru_cache(maxsize=NOISE_CACHE_SIZE)
+def noise_texture(width, height):
+    """
+    원본 캔버스 크기의 주기 노이즈 (잉크 농도, 낟알, 얼룩) float32 배열 3개. 값은 대략 0~1.
+    배열은 캔버스보다 조금 클 수 있으며, 가로/세로 끝이 반대쪽 끝과 이어집니다 (캐시됨, 수정 금지)
+    """
+    np = _numpy()
+    rng = np.random.default_rng(BASE_NOISE_SEED)
+    return (_periodic_noise(rng, width, height, INK_NOISE_CELL),
+            _periodic_noise(rng, width, height, 1),
+            _periodic_noise(rng, width, height, SPECKLE_NOISE_CELL))
+
+def noise_offsets(seed, textures):
+    """seed 별로 각 텍스처를 읽기 시작할 (세로, 가로) 위치"""
+    np = _numpy()
+    rng = np.random.default_rng(seed)
+    return [(int(rng.integers(t.shape[0])), int(rng.integers(t.shape[1]))) for t in textures]
+
+def clear_noise_cache():
+    noise_texture.cache_clear()
+
+def effect_padding(scale=1.0):
+    """영역만 그릴 때 침식/흐림이 이웃 픽셀을 보도록 위아래로 더 그려야 하는 행 수"""
+    return _erode_radius(scale) + _blur_radius(scale) + 1
+
+def _erode_radius(scale):
+    return max(1, int(round(scale)))
+
+def _blur_radius(scale):
+    return max(1, int(round(1.5 * scale)))
+
+def _noise_region(a, offset, canvas, size, scale, origin):
+    """주기 노이즈 a 를 offset 만큼 옮겨 읽은 것 중 출력 영역(origin, size)에 해당하는 부분을 출력 해상도로"""
+    np = _numpy()
+    if scale == 1:
+        rows = (np.arange(origin[1], origin[1] + size[1]) + offset[0]) % a.shape[0]
+        cols = (np.arange(origin[0], origin[0] + size[0]) + offset[1]) % a.shape[1]
+        return a[rows[:, None], cols]
+    # 쌍선형 보간. 가중치를 출력 전체 좌표로 계산하므로 어느 영역(띠)으로 잘라 그려도 값이 같음
+    # (Image.resize(box=...) 는 영역마다 계수가 미세하게 달라 문턱값 근처 픽셀이 뒤집힘)
+    rows, fy = _bilinear_index(np, origin[1], size[1], canvas[1], scale, offset[0], a.shape[0])
+    cols, fx = _bilinear_index(np, origin[0], size[0], canvas[0], scale, offset[1], a.shape[1])
+    v = a[rows[0]] * (1 - fy)[:, None] + a[rows[1]] * fy[:, None]
+    return v[:, cols[0]] * (1 - fx) + v[:, cols[1]] * fx
+
+def _bilinear_index(np, start, count, length, scale, offset, period):
+    u = (np.arange(start, start + count, dtype=np.float64) + 0.5) / scale - 0.5
+    np.clip(u, 0, length - 1, out=u)
+    i0 = u.astype(np.intp)
+    i1 = np.minimum(i0 + 1, length - 1)
+    return ((i0 + offset) % period, (i1 + offset) % period), (u - i0).astype(np.float32)
+
+def _erode(a, r):
+    """(2r+1) 정사각형 최소 필터. 세로/가로를 따로 계산"""
+    np = _numpy()
+    h, w = a.shape
+    p = np.pad(a, ((r, r), (0, 0)), mode="edge")
+    v = p[0:h].copy()
+    for dy in range(1, 2 * r + 1):
+        np.minimum(v, p[dy:dy + h], out=v)
+    p = np.pad(v, ((0, 0), (r, r)), mode="edge")
+    out = p[:, 0:w].copy()
+    for dx in range(1, 2 * r + 1):
+        np.minimum(out, p[:, dx:dx + w], out=out)
+    return out
+
+def _box_blur(a, r):
+    """(2r+1) 상자 흐림. 어긋난 조각의 합으로 세로/가로를 따로 계산"""
+    np = _numpy()
+    h, w = a.shape
+    k = 2 * r + 1
+    p = np.pad(a, ((r, r), (0, 0)), mode="edge")
+    v = p[0:h].copy()
+    for dy in range(1, k):
+        v += p[dy:dy + h]
+    p = np.pad(v, ((0, 0), (r, r)), mode="edge")
+    out = p[:, 0:w].copy()
+    for dx in range(1, k):
+        out += p[:, dx:dx + w]
+    out *= 1.0 / (k * k)
+    return out
+
+def apply_ink_effect(mask, strength, seed, canvas, scale=1.0, origin=(0, 0)):
+    """
+    mask 에 잉크/닳음 효과를 입힌 새 "L" 마스크 (info 는 복사).
+    strength: 0(효과 없음) ~ 1(강하게)
+    canvas: 원본 캔버스 크기 (canvas_size(spec)), scale/origin: mask 가 출력 좌표의 어느 부분인지
+    """
+    np = _numpy()
+    strength = min(1.0, max(0.0, float(strength)))
+    canvas = tuple(canvas)
+    textures = noise_texture(canvas[0], canvas[1])
+    ink, grain, speckle = (_noise_region(layer, offset, canvas, mask.size, scale, origin)
+                           for layer, offset in zip(textures, noise_offsets(seed, textures)))
+
+    a = np.asarray(mask, dtype=np.float32) * (1.0 / 255.0)
+    # 고르지 않은 잉크
+    a *= 1.0 - (0.45 * strength) * ink
+    # 닳은 가장자리: 낟알 노이즈가 낮은 곳은 침식된 값으로
+    a = np.where(grain < 0.6 * strength, _erode(a, _erode_radius(scale)), a)
+    # 얼룩: 중간 주파수 노이즈의 봉우리에 빈 점
+    np.multiply(a, 0.15, out=a, where=speckle > 1.0 - 0.1 * strength)
+    # 번짐: 흐린 마스크를 옅게 바깥쪽으로
+    blurred = _box_blur(a, _blur_radius(scale))
+    blurred *= 0.7 * strength
+    np.maximum(a, blurred, out=a)
+    a *= 255.0
+    a += 0.5
+
+    out = Image.fromarray(np.clip(a, 0, 255, out=a).astype(np.uint8), "L")
+    out.info.update(mask.info)
+    return out
@@ -0,0 +1,552 @@
+"""
+도장 내보내기.
+
+SVG / PDF 는 외곽선 도형과 배치된 글자의 윤곽선(폰트에서 실제로 쓰인 글자만 한 번씩 정의)을
+그대로 옮긴 벡터 파일로, 어떤 인쇄 크기로도 다시 렌더링 없이 확대할 수 있습니다.
+
+대형 인쇄용(600~1200 DPI, 한 변 1만~2만 픽셀) PNG 는 캔버스 전체를 한 번에 만들지 않고
+띠(strip) 단위로 렌더링하면서 PNG 인코더에 행을 바로 흘려 보냅니다.
+최대 메모리는 (가로 폭 x 띠 높이) 에만 비례합니다.
+
+export_set() 은 웹용/문서용/인쇄용 PNG 와 아이콘(ICO)을 배치 한 번으로 한꺼번에 만듭니다.
+"""
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from functools import lru_cache
+from threading import Lock
+import io
+import math
+import os
+import struct
+import uuid
+import zlib
+
+from PIL import Image, ImageColor
+
+from stamp_fonts import get_font, get_glyph_metrics
+from stamp_render import (
+    BORDER_WIDTH, canvas_size, colorize, get_layout, render_mask_region, scaled_size,
+)
+from stamp_trace import span
+
+# 한 번에 렌더링하는 행 수 (2만 픽셀 폭이면 RGBA 기준 약 10MB)
+STRIP_HEIGHT = 128
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+INCH_PER_METER = 1 / 0.0254
+
+# --- 원자적 파일 쓰기 ---
+@contextmanager
+def atomic_write(file_path, mode="wb", encoding=None):
+    """
+    같은 폴더의 임시 파일을 열어 주고, 블록이 정상적으로 끝나면 file_path 로 교체합니다.
+    도중에 실패하거나 프로세스가 죽어도 기존 파일이 반쯤 쓰인 파일로 바뀌지 않습니다.
+    """
+    tmp = f"{file_path}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(tmp, mode, encoding=encoding) as f:
+            yield f
+        os.replace(tmp, file_path)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+# --- 래스터 저장 (PNG / 무손실 WebP) ---
+RASTER_FORMATS = {".png": "PNG", ".webp": "WEBP"}
+DEFAULT_PNG_COMPRESS_LEVEL = 6
+
+def raster_save_options(fmt, compress_level=DEFAULT_PNG_COMPRESS_LEVEL, optimize=False):
+    """
+    Image.save 에 넘길 인코더 옵션.
+    PNG: compress_level 0(빠름, 큼) ~ 9(느림, 작음), optimize 는 가장 작은 결과를 찾느라 더 느림
+    WebP: 항상 무손실. compress_level 을 압축 노력(method 0~6)으로 환산
+    """
+    if fmt == "WEBP":
+        return {"lossless": True, "quality": 80,
+                "method": 6 if optimize else min(6, round(compress_level * 6 / 9))}
+    return {"compress_level": compress_level, "optimize": optimize}
+
+def save_raster(img, file_path, compress_level=DEFAULT_PNG_COMPRESS_LEVEL, optimize=False):
+    """확장자(.png/.webp)로 형식을 골라 원자적으로 저장합니다. 알 수 없는 확장자는 PNG"""
+    fmt = RASTER_FORMATS.get(os.path.splitext(file_path)[1].lower(), "PNG")
+    with span("encode"), atomic_write(file_path) as f:
+        img.save(f, fmt, **raster_save_options(fmt, compress_level, optimize))
+
+# --- PNG 색상 모드 ---
+# 도장은 한 가지 색에 투명도만 다르므로 RGBA(픽셀당 4바이트) 대신
+# P: 팔레트 256칸을 모두 도장 색으로 채우고 칸마다 투명도(tRNS)를 0~255 로 둔 1바이트 PNG
+# LA: 회색 + 알파 2바이트 PNG (검정/회색 도장만)
+PNG_MODES = ("RGBA", "P", "LA")
+
+def _gray_level(color):
+    r, g, b = ImageColor.getrgb(color)[:3]
+    if not r == g == b:
+        raise ValueError(f"LA(회색+알파) 모드는 회색 도장에만 쓸 수 있습니다: {color}")
+    return r
+
+def mask_palette(color):
+    """P 모드용 (팔레트 bytes, 투명도 bytes). 마스크 값이 곧 팔레트 번호이자 투명도"""
+    rgb = bytes(ImageColor.getrgb(color)[:3])
+    return rgb * 256, bytes(range(256))
+
+def mask_to_image(mask, color, mode="RGBA"):
+    """render_mask() 결과를 mode(RGBA/P/LA) 이미지로. P 의 투명도는 info["transparency"] 에 들어 있음"""
+    if mode == "RGBA":
+        return colorize(mask, color)
+    if mode == "P":
+        palette, alpha = mask_palette(color)
+        img = mask.copy()
+        img.putpalette(palette)
+        img.info["transparency"] = alpha
+        return img
+    if mode == "LA":
+        return Image.merge("LA", (Image.new("L", mask.size, _gray_level(color)), mask))
+    raise ValueError(f"알 수 없는 PNG 색상 모드: {mode}")
+
+def save_mask(mask, color, file_path, mode="RGBA", compress_level=DEFAULT_PNG_COMPRESS_LEVEL,
+              optimize=False):
+    """마스크에 color 를 입혀 저장합니다. P/LA 는 PNG 에만 적용되고 WebP 는 항상 RGBA"""
+    fmt = RASTER_FORMATS.get(os.path.splitext(file_path)[1].lower(), "PNG")
+    img = mask_to_image(mask, color, mode if fmt == "PNG" else "RGBA")
+    save_raster(img, file_path, compress_level, optimize)
+
+def encode_raster(img, fmt="PNG", compress_level=DEFAULT_PNG_COMPRESS_LEVEL, optimize=False):
+    """파일 대신 메모리로 인코딩한 bytes (묶음 파일/HTTP 응답용)"""
+    with span("encode"):
+        buf = io.BytesIO()
+        img.save(buf, fmt, **raster_save_options(fmt, compress_level, optimize))
+        return buf.getvalue()
+
+# --- 인쇄 크기 계산 ---
+def print_scale(spec, width_mm, dpi):
+    """가로 width_mm 를 dpi 로 인쇄할 때 필요한 렌더링 배율"""
+    width, _ = canvas_size(spec)
+    return (width_mm / 25.4 * dpi) / width
+
+# --- 스트리밍 PNG 쓰기 ---
+def _png_chunk(tag, data):
+    return (struct.pack(">I", len(data)) + tag + data
+            + struct.pack(">I", zlib.crc32(tag + data) & 0xFFFFFFFF))
+
+def export_large_png(spec, file_path, dpi=600, scale=1.0, strip_height=STRIP_HEIGHT,
+                     compress_level=DEFAULT_PNG_COMPRESS_LEVEL, progress=None, mode="RGBA", layout=None):
+    """
+    spec 을 scale 배율로 렌더링해 file_path 에 PNG 로 씁니다.
+    dpi 는 pHYs 청크로 파일에 기록됩니다.
+    mode: PNG_MODES 중 하나. P/LA 는 RGBA 보다 띠 버퍼와 파일이 각각 1/4, 1/2
+    progress: 띠 하나를 쓸 때마다 progress(완료된 행 수, 전체 행 수) 호출
+    layout: 미리 구한 StampLayout (없으면 get_layout(spec))
+    반환: (width, height)
+    """
+    if mode not in PNG_MODES:
+        raise ValueError(f"알 수 없는 PNG 색상 모드: {mode}")
+    gray = _gray_level(spec.color) if mode == "LA" else None
+    width, height = scaled_size(spec, scale)
+    # 배치는 한 번만 계산해서 모든 띠가 공유
+    if layout is None:
+        layout = get_layout(spec)
+    ppm = int(round(dpi * INCH_PER_METER))
+    # (PNG color type, 픽셀당 바이트)
+    color_type, bpp = {"RGBA": (6, 4), "P": (3, 1), "LA": (4, 2)}[mode]
+    stride = width * bpp
+
+    compressor = zlib.compressobj(compress_level)
+    with atomic_write(file_path) as f:
+        f.write(PNG_SIGNATURE)
+        # 8비트, 비인터레이스
+        f.write(_png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, color_type, 0, 0, 0)))
+        if mode == "P":
+            palette, alpha = mask_palette(spec.color)
+            f.write(_png_chunk(b"PLTE", palette))
+            f.write(_png_chunk(b"tRNS", alpha))
+        f.write(_png_chunk(b"pHYs", struct.pack(">IIB", ppm, ppm, 1)))
+        for top in range(0, height, strip_height):
+            bottom = min(height, top + strip_height)
+            mask = render_mask_region(spec, (0, top, width, bottom), scale, layout)
+            with span("encode"):
+                if mode == "P":
+                    strip = mask
+                elif mode == "LA":
+                    strip = Image.merge("LA", (Image.new("L", mask.size, gray), mask))
+                else:
+                    strip = colorize(mask, spec.color)
+                raw = strip.tobytes()
+                # 각 행 앞에 필터 타입 0(None) 바이트
+                rows = b"".join(b"\x00" + raw[i:i + stride] for i in range(0, len(raw), stride))
+                data = compressor.compress(rows)
+            if data:
+                f.write(_png_chunk(b"IDAT", data))
+            if progress is not None:
+                progress(bottom, height)
+        f.write(_png_chunk(b"IDAT", compressor.flush()))
+        f.write(_png_chunk(b"IEND", b""))
+    return width, height
+
+# --- 묶음 내보내기 (여러 크기/형식을 한 번에) ---
+# kind: "png" = 긴 변 size 픽셀 PNG, "print" = size=(가로 mm, DPI) 인쇄용 PNG,
+#       "ico" = size=(한 변 픽셀, ...) 아이콘. 파일 이름은 <기본 이름>_<suffix>.<확장자>
+ExportTarget = namedtuple("ExportTarget", "suffix kind size")
+
+DEFAULT_EXPORT_SET = (
+    ExportTarget("200", "png", 200),
+    ExportTarget("300", "png", 300),
+    ExportTarget("400", "png", 400),
+    ExportTarget("print", "print", (60.0, 600)),
+    ExportTarget("icon", "ico", (16, 24, 32, 48, 64, 128, 256)),
+)
+
+def export_set_paths(base_path, targets=DEFAULT_EXPORT_SET):
+    """base_path("도장.png" 등)에서 목표별 파일 경로 목록. 확장자는 목표 형식으로 바뀜"""
+    stem = os.path.splitext(base_path)[0]
+    return [f"{stem}_{t.suffix}.{'ico' if t.kind == 'ico' else 'png'}" for t in targets]
+
+def _icon_image(spec, layout, side):
+    """긴 변이 side 가 되게 렌더링해 side x side 투명 캔버스 가운데에 놓은 RGBA"""
+    width, height = canvas_size(spec)
+    scale = side / max(width, height)
+    w, h = scaled_size(spec, scale)
+    mask = render_mask_region(spec, (0, 0, w, h), scale, layout)
+    if (w, h) == (side, side):
+        return colorize(mask, spec.color)
+    square = Image.new("L", (side, side), 0)
+    square.paste(mask, ((side - w) // 2, (side - h) // 2))
+    return colorize(square, spec.color)
+
+def _export_target(spec, layout, target, file_path, compress_level, mode):
+    width, height = canvas_size(spec)
+    if target.kind == "png":
+        scale = target.size / max(width, height)
+        w, h = scaled_size(spec, scale)
+        mask = render_mask_region(spec, (0, 0, w, h), scale, layout)
+        save_mask(mask, spec.color, file_path, mode, compress_level)
+    elif target.kind == "print":
+        width_mm, dpi = target.size
+        export_large_png(spec, file_path, dpi=dpi, scale=print_scale(spec, width_mm, dpi),
+                         compress_level=compress_level, mode=mode, layout=layout)
+    elif target.kind == "ico":
+        # 크기마다 따로 렌더링해서 넣음 (가장 큰 것을 축소하면 작은 아이콘의 획이 뭉개짐)
+        sides = sorted(target.size, reverse=True)
+        images = [_icon_image(spec, layout, side) for side in sides]
+        with span("encode"), atomic_write(file_path) as f:
+            images[0].save(f, "ICO", sizes=[(side, side) for side in sides], append_images=images[1:])
+    else:
+        raise ValueError(f"알 수 없는 내보내기 종류: {target.kind}")
+    return file_path
+
+def export_set(spec, base_path, targets=DEFAULT_EXPORT_SET, compress_level=DEFAULT_PNG_COMPRESS_LEVEL,
+               mode="RGBA", max_workers=None, progress=None):
+    """
+    배치를 한 번만 계산하고 targets 의 크기/형식을 스레드 풀에서 나눠 렌더링/저장합니다.
+    (Pillow 의 래스터화·압축은 GIL 을 놓으므로 병렬로 빨라짐)
+    progress: 파일 하나가 끝날 때마다 progress(완료 수, 전체 수, 경로) 호출
+    반환: 쓴 파일 경로 목록 (targets 순서)
+    """
+    with span("layout"):
+        layout = get_layout(spec)
+    paths = export_set_paths(base_path, targets)
+    if max_workers is None:
+        max_workers = min(len(targets), os.cpu_count() or 1)
+    with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="export") as pool:
+        futures = [pool.submit(_export_target, spec, layout, target, path, compress_level, mode)
+                   for target, path in zip(targets, paths)]
+        for done, future in enumerate(as_completed(futures), 1):
+            path = future.result()
+            if progress is not None:
+                progress(done, len(futures), path)
+    return paths
+
+# --- 글자 윤곽선 (벡터 출력용) ---
+# fontTools 는 SVG/PDF 내보내기에서만 필요하므로 사용할 때 import 합니다.
+_outline_lock = Lock()
+
+@lru_cache(maxsize=8)
+def _load_outline_font(font_path):
+    try:
+        from fontTools.ttLib import TTFont
+    except ImportError:
+        raise RuntimeError("SVG/PDF 내보내기에는 fontTools 가 필요합니다. (pip install fonttools)")
+    tt = TTFont(font_path, lazy=True)
+    return tt, tt.getGlyphSet(), tt.getBestCmap(), tt["head"].unitsPerEm
+
+@lru_cache(maxsize=4096)
+def glyph_outline(font_path, ch):
+    """
+    글자 하나의 윤곽선을 폰트 단위 좌표(y 위쪽 방향)의 명령 목록으로 돌려줍니다.
+    ("M", x, y) / ("L", x, y) / ("C", x1, y1, x2, y2, x3, y3) / ("Z",)
+    2차 곡선은 3차 곡선으로 변환되어 SVG 와 PDF 가 같은 데이터를 씁니다.
+    폰트에 없는 글자면 빈 목록을 돌려줍니다.
+    """
+    from fontTools.pens.basePen import BasePen
+
+    class _OutlinePen(BasePen):
+        def __init__(self, glyph_set):
+            BasePen.__init__(self, glyph_set)
+            self.ops = []
+
+        def _moveTo(self, pt):
+            self.ops.append(("M",) + tuple(pt))
+
+        def _lineTo(self, pt):
+            self.ops.append(("L",) + tuple(pt))
+
+        def _curveToOne(self, pt1, pt2, pt3):
+            self.ops.append(("C",) + tuple(pt1) + tuple(pt2) + tuple(pt3))
+
+        def _closePath(self):
+            self.ops.append(("Z",))
+
+    # TTFont 은 스레드 안전하지 않으므로 윤곽선 추출은 직렬화
+    with _outline_lock:
+        tt, glyph_set, cmap, _ = _load_outline_font(font_path)
+        glyph_name = cmap.get(ord(ch))
+        if glyph_name is None:
+            return ()
+        pen = _OutlinePen(glyph_set)
+        glyph_set[glyph_name].draw(pen)
+        return tuple(pen.ops)
+
+def vector_glyphs(layout):
+    """
+    StampLayout 을 벡터 출력용 글자 목록으로 바꿉니다 (원본 크기 픽셀 좌표).
+    반환: [(글자, 원점 x, 기준선 y, 폰트 단위 -> 픽셀 배율, 회전, 폰트 경로), ...]
+    회전은 회전하지 않은 글자면 None, 아니면 (반시계 각도, 잉크 중심 x, 잉크 중심 y) 입니다.
+    폰트 경로는 대체 폰트로 그리는 글자면 그 폰트, 아니면 layout.font_path 입니다.
+    """
+    glyphs = []
+    for g in layout.glyphs:
+        font_path = g.font_path or layout.font_path
+        font = get_font(font_path, g.font_size)
+        metrics = get_glyph_metrics(font)
+        k = g.font_size / _load_outline_font(font_path)[3]
+        x, baseline = g.x, g.y + font.getmetrics()[0]
+        rotation = None
+        if g.rotation:
+            # 래스터와 같이 잉크 영역 중심을 기준으로 회전 (회전 글자는 항상 한 글자)
+            l, t, r, b = metrics.bbox(g.glyph)
+            rotation = (g.rotation, g.x + (l + r) / 2, g.y + (t + b) / 2)
+        # 좌->우는 문자열 전체가 한 항목이므로 글자별 advance 로 나눔
+        for ch in g.glyph:
+            if not ch.isspace():
+                glyphs.append((ch, x, baseline, k, rotation, font_path))
+            x += metrics.advance(ch)
+    return glyphs
+
+def _fmt(v):
+    return ("%.2f" % v).rstrip("0").rstrip(".")
+
+# --- SVG ---
+def _svg_path_data(ops):
+    parts = []
+    for op in ops:
+        parts.append(op[0] + " ".join(_fmt(v) for v in op[1:]))
+    return "".join(parts)
+
+def export_svg(spec, file_path, width_mm=None):
+    """
+    spec 을 SVG 로 씁니다. width_mm 를 주면 문서 크기를 mm 단위로 지정합니다.
+    """
+    layout = get_layout(spec)
+    width, height = layout.width, layout.height
+    glyphs = vector_glyphs(layout)
+    color = spec.color
+    if width_mm:
+        size_attr = f'width="{_fmt(width_mm)}mm" height="{_fmt(width_mm * height / width)}mm"'
+    else:
+        size_attr = f'width="{width}" height="{height}"'
+
+    ids = {}
+    defs = []
+    uses = []
+    for ch, x, y, k, rotation, font_path in glyphs:
+        key = (font_path, ch)
+        if key not in ids:
+            ops = glyph_outline(font_path, ch)
+            if not ops:
+                continue
+            ids[key] = f"g{len(ids)}"
+            defs.append(f'<path id="{ids[key]}" d="{_svg_path_data(ops)}"/>')
+        if key in ids:
+            transform = f"translate({_fmt(x)} {_fmt(y)}) scale({_fmt(k)} {_fmt(-k)})"
+            if rotation:
+                # SVG 는 y 가 아래쪽이라 시계 방향이 양수
+                angle, cx, cy = rotation
+                transform = f"rotate({_fmt(-angle)} {_fmt(cx)} {_fmt(cy)}) " + transform
+            uses.append(f'<use href="#{ids[key]}" xlink:href="#{ids[key]}" transform="{transform}"/>')
+
+    half = BORDER_WIDTH / 2
+    borders = []
+    for shape in layout.borders:
+        l, t, r, b = shape[1]
+        if shape[0] == "ellipse":
+            # PIL 은 상자 안쪽으로 선을 그리므로 선 중심은 두께/2 만큼 안쪽
+            borders.append(f'<ellipse cx="{_fmt((l + r) / 2)}" cy="{_fmt((t + b) / 2)}" '
+                           f'rx="{_fmt((r - l) / 2 - half)}" ry="{_fmt((b - t) / 2 - half)}"/>')
+        elif shape[0] == "rectangle":
+            borders.append(f'<rect x="{_fmt(l + half)}" y="{_fmt(t + half)}" '
+                           f'width="{_fmt(r - l - BORDER_WIDTH)}" height="{_fmt(b - t - BORDER_WIDTH)}"/>')
+        else:
+            borders.append(f'<rect x="{_fmt(l)}" y="{_fmt(t)}" width="{_fmt(r - l)}" '
+                           f'height="{_fmt(b - t)}" rx="{_fmt(shape[2])}"/>')
+
+    svg = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        f'<svg xmlns="http://www.w3.org/2000/svg" xmlns:xlink="http://www.w3.org/1999/xlink" '
+        f'{size_attr} viewBox="0 0 {width} {height}">',
+        "<defs>", *defs, "</defs>",
+        f'<g fill="none" stroke="{color}" stroke-width="{BORDER_WIDTH}">', *borders, "</g>",
+        f'<g fill="{color}">', *uses, "</g>",
+        "</svg>",
+    ]
+    with atomic_write(file_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(svg))
+
+# --- PDF ---
+# 베지어로 원/타원을 그릴 때 쓰는 상수 4*(sqrt(2)-1)/3
+_KAPPA = 0.5522847498
+
+def _pdf_path_ops(ops):
+    out = []
+    for op in ops:
+        args = " ".join(_fmt(v) for v in op[1:])
+        if op[0] == "M":
+            out.append(f"{args} m")
+        elif op[0] == "L":
+            out.append(f"{args} l")
+        elif op[0] == "C":
+            out.append(f"{args} c")
+        else:
+            out.append("h")
+    return "\n".join(out)
+
+def _pdf_ellipse(cx, cy, rx, ry):
+    ox, oy = rx * _KAPPA, ry * _KAPPA
+    f = _fmt
+    return "\n".join([
+        f"{f(cx + rx)} {f(cy)} m",
+        f"{f(cx + rx)} {f(cy + oy)} {f(cx + ox)} {f(cy + ry)} {f(cx)} {f(cy + ry)} c",
+        f"{f(cx - ox)} {f(cy + ry)} {f(cx - rx)} {f(cy + oy)} {f(cx - rx)} {f(cy)} c",
+        f"{f(cx - rx)} {f(cy - oy)} {f(cx - ox)} {f(cy - ry)} {f(cx)} {f(cy - ry)} c",
+        f"{f(cx + ox)} {f(cy - ry)} {f(cx + rx)} {f(cy - oy)} {f(cx + rx)} {f(cy)} c",
+        "h S",
+    ])
+
+def _pdf_rounded_rect(l, t, r, b, rad):
+    o = rad * (1 - _KAPPA)
+    f = _fmt
+    return "\n".join([
+        f"{f(l + rad)} {f(t)} m",
+        f"{f(r - rad)} {f(t)} l",
+        f"{f(r - o)} {f(t)} {f(r)} {f(t + o)} {f(r)} {f(t + rad)} c",
+        f"{f(r)} {f(b - rad)} l",
+        f"{f(r)} {f(b - o)} {f(r - o)} {f(b)} {f(r - rad)} {f(b)} c",
+        f"{f(l + rad)} {f(b)} l",
+        f"{f(l + o)} {f(b)} {f(l)} {f(b - o)} {f(l)} {f(b - rad)} c",
+        f"{f(l)} {f(t + rad)} l",
+        f"{f(l)} {f(t + o)} {f(l + o)} {f(t)} {f(l + rad)} {f(t)} c",
+        "h S",
+    ])
+
+def _pdf_rotation(rotation):
+    # vector_glyphs 의 회전을 cm 연산자로 (픽셀 좌표계, y 아래쪽). 회전이 없으면 빈 문자열
+    if not rotation:
+        return ""
+    angle, cx, cy = rotation
+    c, s = math.cos(math.radians(angle)), math.sin(math.radians(angle))
+    e, f = cx - (c * cx + s * cy), cy - (-s * cx + c * cy)
+    # 회전 성분은 소수 둘째 자리로 자르면 가장자리 글자가 1px 가까이 밀리므로 넉넉하게
+    c, s = "%.5f" % c, "%.5f" % s
+    neg_s = s[1:] if s.startswith("-") else "-" + s
+    return f"{c} {neg_s} {s} {c} {_fmt(e)} {_fmt(f)} cm "
+
+def export_pdf(spec, file_path, width_mm=None):
+    """
+    spec 을 한 페이지짜리 PDF 로 씁니다. 쓰인 글자마다 Form XObject 를 한 번씩 정의하고 재사용합니다.
+    width_mm 가 없으면 96 DPI 기준 크기로 페이지를 잡습니다.
+    """
+    layout = get_layout(spec)
+    width, height = layout.width, layout.height
+    glyphs = vector_glyphs(layout)
+    r, g, b = ImageColor.getrgb(spec.color)[:3]
+    rgb = f"{_fmt(r / 255)} {_fmt(g / 255)} {_fmt(b / 255)}"
+
+    page_w = width_mm / 25.4 * 72 if width_mm else width * 0.75
+    px = page_w / width  # 픽셀 -> pt
+    page_h = height * px
+
+    objects = []  # 1번부터 순서대로
+
+    def add(obj):
+        objects.append(obj)
+        return len(objects)
+
+    def stream(dict_body, data):
+        data = zlib.compress(data.encode("ascii"))
+        return (f"<< {dict_body} /Filter /FlateDecode /Length {len(data)} >>\nstream\n").encode("ascii") \
+            + data + b"\nendstream"
+
+    # 1: Catalog, 2: Pages, 3: Page 는 자리만 먼저 잡음
+    add(None)
+    add(None)
+    add(None)
+
+    xobjects = {}
+    for ch, *_, font_path in glyphs:
+        key = (font_path, ch)
+        if key in xobjects:
+            continue
+        ops = glyph_outline(font_path, ch)
+        if not ops:
+            continue
+        xs = [v for op in ops for v in op[1::2]]
+        ys = [v for op in ops for v in op[2::2]]
+        bbox = " ".join(_fmt(v) for v in (min(xs), min(ys), max(xs), max(ys)))
+        xobjects[key] = add(stream(f"/Type /XObject /Subtype /Form /BBox [{bbox}]",
+                                  _pdf_path_ops(ops) + "\nf"))
+
+    names = {key: f"G{i}" for i, key in enumerate(xobjects)}
+    content = [
+        "q",
+        # 픽셀 좌표(y 아래쪽)를 PDF 좌표(y 위쪽, pt)로
+        f"{_fmt(px)} 0 0 {_fmt(-px)} 0 {_fmt(page_h)} cm",
+    ]
+    half = BORDER_WIDTH / 2
+    content += [f"{rgb} RG", f"{BORDER_WIDTH} w"]
+    for shape in layout.borders:
+        l, t, rr, bb = shape[1]
+        if shape[0] == "ellipse":
+            content.append(_pdf_ellipse((l + rr) / 2, (t + bb) / 2,
+                                        (rr - l) / 2 - half, (bb - t) / 2 - half))
+        elif shape[0] == "rectangle":
+            content.append(f"{_fmt(l + half)} {_fmt(t + half)} "
+                           f"{_fmt(rr - l - BORDER_WIDTH)} {_fmt(bb - t - BORDER_WIDTH)} re S")
+        else:
+            content.append(_pdf_rounded_rect(l, t, rr, bb, shape[2]))
+    content.append(f"{rgb} rg")
+    for ch, x, y, k, rotation, font_path in glyphs:
+        key = (font_path, ch)
+        if key in names:
+            content.append(f"q {_pdf_rotation(rotation)}{_fmt(k)} 0 0 {_fmt(-k)} {_fmt(x)} {_fmt(y)} cm "
+                           f"/{names[key]} Do Q")
+    content.append("Q")
+    content_id = add(stream("", "\n".join(content)))
+
+    xobject_dict = " ".join(f"/{names[key]} {oid} 0 R" for key, oid in xobjects.items())
+    objects[0] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[1] = b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>"
+    objects[2] = (f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {_fmt(page_w)} {_fmt(page_h)}] "
+                  f"/Resources << /XObject << {xobject_dict} >> >> /Contents {content_id} 0 R >>").encode("ascii")
+
+    with atomic_write(file_path) as f:
+        f.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        offsets = []
+        for i, obj in enumerate(objects, 1):
+            offsets.append(f.tell())
+            f.write(f"{i} 0 obj\n".encode("ascii") + obj + b"\nendobj\n")
+        xref = f.tell()
+        f.write(f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode("ascii"))
+        for off in offsets:
+            f.write(f"{off:010d} 00000 n \n".encode("ascii"))
+        f.write(f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode("ascii"))
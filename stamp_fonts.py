@@ -0,0 +1,338 @@
+"""
+폰트 객체 / 글자 측정값 / 글자 마스크 관리.
+
+ImageFont.truetype() 는 CJK 폰트(HJ한전서, 나눔명조, 맑은 고딕)를 매번 파싱하므로 비용이 큽니다.
+(폰트 경로, 크기) 단위로 로딩한 폰트 객체를 공유 LRU 캐시에 보관해 모든 렌더링 경로가 재사용합니다.
+"""
+from collections import OrderedDict
+from functools import lru_cache
+from threading import Lock
+import math
+import os
+
+from PIL import Image, ImageDraw, ImageFont
+
+from stamp_trace import span
+
+# 동시에 쓰이는 (폰트, 크기) 조합 수보다 넉넉하게 (자동 맞춤이 여러 크기를 시도함)
+FONT_CACHE_SIZE = 64
+# 글자 지원 표를 보관할 폰트 파일 수 (설치된 폰트 + 대체 폰트 목록보다 넉넉하게)
+COVERAGE_CACHE_SIZE = 256
+
+# --- 폰트 객체 캐시 ---
+@lru_cache(maxsize=FONT_CACHE_SIZE)
+def get_font(font_path, size):
+    """
+    font_path, size 에 해당하는 FreeType 폰트 객체를 돌려줍니다.
+    로딩에 실패하면 PIL 기본 폰트를 돌려줍니다.
+    lru_cache 는 스레드 안전하며, 반환된 폰트 객체는 읽기 전용으로만 사용합니다.
+    """
+    with span("font_load"):
+        try:
+            return ImageFont.truetype(font_path, int(size))
+        except Exception:
+            return ImageFont.load_default()
+
+def font_cache_info():
+    """캐시 적중/실패 횟수 (hits, misses, maxsize, currsize)"""
+    return get_font.cache_info()
+
+def clear_font_cache():
+    get_font.cache_clear()
+    _cached_coverage.cache_clear()
+
+# --- 글자별 측정값(glyph metrics) 표 ---
+# 한글 음절 블록 (가 ~ 힣)
+HANGUL_SYLLABLES_RANGE = (0xAC00, 0xD7A3)
+
+class GlyphMetrics:
+    """
+    한 폰트 객체(= 폰트 경로 + 크기)의 글자별 bbox / advance 표.
+    처음 조회할 때 한 번만 측정하고 이후에는 표에서 바로 돌려줍니다.
+    값: (bbox, advance), bbox 는 draw.textbbox((0,0), ch) 와 같은 (left, top, right, bottom)
+    """
+    __slots__ = ("font", "_table")
+
+    def __init__(self, font):
+        self.font = font
+        self._table = {}
+
+    def _measure(self, ch):
+        try:
+            bbox = self.font.getbbox(ch)
+        except AttributeError:
+            # 구버전 Pillow
+            w, h = self.font.getsize(ch)
+            bbox = (0, 0, w, h)
+        try:
+            advance = self.font.getlength(ch)
+        except AttributeError:
+            advance = bbox[2]
+        entry = (bbox, advance)
+        # dict 대입은 원자적이므로 동시에 채워도 같은 값으로 덮어쓸 뿐입니다.
+        self._table[ch] = entry
+        return entry
+
+    def _get(self, ch):
+        entry = self._table.get(ch)
+        if entry is None:
+            entry = self._measure(ch)
+        return entry
+
+    def bbox(self, ch):
+        return self._get(ch)[0]
+
+    def size(self, ch):
+        """(w, h) = bbox 폭/높이"""
+        b = self._get(ch)[0]
+        return b[2] - b[0], b[3] - b[1]
+
+    def advance(self, ch):
+        return self._get(ch)[1]
+
+    def max_size(self, text):
+        """text 안 글자들의 최대 (w, h)"""
+        mw, mh = 0, 0
+        for ch in text:
+            w, h = self.size(ch)
+            mw = max(mw, w)
+            mh = max(mh, h)
+        return mw, mh
+
+    def prewarm(self, chars):
+        for ch in chars:
+            if ch not in self._table:
+                self._measure(ch)
+        return len(self._table)
+
+@lru_cache(maxsize=FONT_CACHE_SIZE)
+def get_glyph_metrics(font):
+    """
+    font 객체별 GlyphMetrics 표.
+    get_font() 가 (경로, 크기)마다 같은 객체를 돌려주므로 실질적인 키는 (폰트, 크기, 글자) 입니다.
+    """
+    return GlyphMetrics(font)
+
+# --- 글자 지원 범위 (cmap) ---
+# 폰트에 없는 글자는 FreeType 이 빈 네모(tofu)로 그리므로, 래스터화 전에 지원 여부를 확인하고
+# 대체 폰트로 넘깁니다. 지원 범위는 폰트마다 한 번만 비트맵으로 만들어 글자당 O(1) 로 조회합니다.
+class GlyphCoverage:
+    """폰트 하나의 cmap 지원 범위 비트맵. `ch in coverage` 로 조회"""
+    __slots__ = ("_bits",)
+
+    def __init__(self, ranges):
+        top = max((e for _, e in ranges), default=-1)
+        bits = bytearray(top // 8 + 1)
+        for start, end in ranges:
+            # 가운데 온전한 바이트는 한 번에 채우고 양 끝만 비트 단위로
+            full_lo, full_hi = (start + 7) >> 3, (end + 1) >> 3
+            if full_lo < full_hi:
+                bits[full_lo:full_hi] = b"\xff" * (full_hi - full_lo)
+                edges = list(range(start, full_lo << 3)) + list(range(full_hi << 3, end + 1))
+            else:
+                edges = range(start, end + 1)
+            for c in edges:
+                bits[c >> 3] |= 1 << (c & 7)
+        self._bits = bytes(bits)
+
+    def __contains__(self, ch):
+        code = ord(ch)
+        i = code >> 3
+        return i < len(self._bits) and bool(self._bits[i] >> (code & 7) & 1)
+
+    def missing(self, text):
+        """text 중 폰트에 없는 글자 (공백 제외, 중복 제거, 순서 유지)"""
+        return "".join(dict.fromkeys(ch for ch in text if not ch.isspace() and ch not in self))
+
+def get_coverage(font_path):
+    """
+    font_path 의 GlyphCoverage. 폰트 레지스트리 인덱스가 최신이면 파싱 없이 사용합니다.
+    파일을 읽을 수 없으면 None (지원 여부를 알 수 없으므로 모두 지원하는 것으로 취급)
+    """
+    # 레지스트리처럼 (수정 시각, 크기)까지 키로 써서 폰트 파일이 바뀌면 다시 읽음
+    try:
+        st = os.stat(font_path)
+    except OSError:
+        return None
+    return _cached_coverage(font_path, st.st_mtime_ns, st.st_size)
+
+@lru_cache(maxsize=COVERAGE_CACHE_SIZE)
+def _cached_coverage(font_path, mtime_ns, size):
+    # stamp_registry -> stamp_render -> stamp_fonts 순환을 피하려고 여기서 import
+    from stamp_registry import font_ranges
+    ranges = font_ranges(font_path)
+    return None if ranges is None else GlyphCoverage(ranges)
+
+def fallback_fonts_for(text, font_path, fallback_paths):
+    """
+    text 중 font_path 에 없는 글자마다 fallback_paths 에서 처음으로 그 글자를 가진 폰트를 고릅니다.
+    반환: ({글자: 대체 폰트 경로}, 어느 폰트에도 없는 글자 문자열)
+    """
+    coverage = get_coverage(font_path)
+    if coverage is None:
+        return {}, ""
+    missing = coverage.missing(text)
+    if not missing:
+        return {}, ""
+    chosen = {}
+    for path in fallback_paths:
+        if path == font_path:
+            continue
+        other = get_coverage(path)
+        if other is None:
+            continue
+        for ch in missing:
+            if ch not in chosen and ch in other:
+                chosen[ch] = path
+        if len(chosen) == len(missing):
+            break
+    return chosen, "".join(ch for ch in missing if ch not in chosen)
+
+class FallbackMetrics:
+    """
+    대체 폰트가 섞인 글자 측정값. GlyphMetrics 와 같은 방법을 제공하며,
+    대체 폰트로 그릴 글자는 그 폰트의 측정값을 돌려줍니다.
+    """
+    __slots__ = ("primary", "_by_char")
+
+    def __init__(self, primary, by_char):
+        self.primary = primary
+        self._by_char = by_char
+
+    def _metrics(self, ch):
+        return self._by_char.get(ch[:1], self.primary)
+
+    def bbox(self, ch):
+        return self._metrics(ch).bbox(ch)
+
+    def size(self, ch):
+        return self._metrics(ch).size(ch)
+
+    def advance(self, ch):
+        return self._metrics(ch).advance(ch)
+
+    def max_size(self, text):
+        mw, mh = 0, 0
+        for ch in text:
+            w, h = self.size(ch)
+            mw = max(mw, w)
+            mh = max(mh, h)
+        return mw, mh
+
+def metrics_with_fallback(font_path, size, fallback=None):
+    """
+    (font_path, size) 의 측정값. fallback ({글자: 폰트 경로}) 이 있으면
+    그 글자들은 해당 폰트의 같은 크기 측정값을 쓰는 FallbackMetrics 를 돌려줍니다.
+    """
+    primary = get_glyph_metrics(get_font(font_path, size))
+    if not fallback:
+        return primary
+    return FallbackMetrics(primary, {ch: get_glyph_metrics(get_font(path, size))
+                                     for ch, path in fallback.items()})
+
+def prewarm_hangul(font_path, size):
+    """한글 음절 블록 전체(11,172자)를 미리 측정해 둡니다. 반환: 표에 들어있는 글자 수"""
+    start, end = HANGUL_SYLLABLES_RANGE
+    metrics = get_glyph_metrics(get_font(font_path, size))
+    return metrics.prewarm(chr(c) for c in range(start, end + 1))
+
+# --- 글자 마스크 아틀라스 ---
+# 글자마다 FreeType 래스터화를 다시 하지 않도록 (폰트, 크기, 글자)별 8비트 마스크를 보관합니다.
+# 메모리 상한을 넘으면 가장 오래 쓰이지 않은 마스크부터 버립니다.
+ATLAS_BUDGET_BYTES = 32 * 1024 * 1024
+
+_atlas = OrderedDict()
+_atlas_lock = Lock()
+_atlas_stats = {"hits": 0, "misses": 0, "bytes": 0}
+
+# 회전된 글자는 이 각도 단위로 반올림해서 캐시 (둘레 배치에서 같은 각도가 반복 재사용됨)
+ROTATION_STEP_DEGREES = 1.0
+
+def quantize_angle(angle):
+    q = round(angle / ROTATION_STEP_DEGREES) * ROTATION_STEP_DEGREES % 360.0
+    return 0.0 if q == 0 else q
+
+def _rasterize_glyph(font, ch, angle):
+    if angle:
+        # 회전하지 않은 마스크를 잉크 영역 중심 기준으로 돌림 (expand 로 잘림 방지)
+        base, (l, t) = get_glyph_mask(font, ch)
+        mask = base.rotate(angle, resample=Image.BICUBIC, expand=True)
+        cx, cy = l + base.width / 2, t + base.height / 2
+        return mask, (cx - mask.width / 2, cy - mask.height / 2)
+    l, t, r, b = get_glyph_metrics(font).bbox(ch)
+    mask = Image.new("L", (max(1, r - l), max(1, b - t)), 0)
+    ImageDraw.Draw(mask).text((-l, -t), ch, font=font, fill=255)
+    return mask, (l, t)
+
+def get_glyph_mask(font, ch, angle=0.0):
+    """
+    (mask, (dx, dy)) 반환. mask 는 "L" 모드 이미지이고,
+    draw.text((x, y), ch) 와 같은 위치에 찍으려면 (x + dx, y + dy) 에 붙이면 됩니다.
+    angle: 반시계 방향 회전 각도(도). ROTATION_STEP_DEGREES 단위로 반올림되며,
+    회전한 글자는 잉크 영역의 중심이 회전하지 않았을 때와 같은 자리에 오도록 오프셋이 잡힙니다.
+    """
+    angle = quantize_angle(angle)
+    key = (getattr(font, "path", None), getattr(font, "size", None), ch, angle)
+    with _atlas_lock:
+        entry = _atlas.get(key)
+        if entry is not None:
+            _atlas.move_to_end(key)
+            _atlas_stats["hits"] += 1
+            return entry
+        _atlas_stats["misses"] += 1
+
+    # 래스터화는 잠금 밖에서 (동시에 같은 글자를 만들면 한쪽 결과만 남음)
+    entry = _rasterize_glyph(font, ch, angle)
+    size = entry[0].width * entry[0].height
+    with _atlas_lock:
+        if key not in _atlas:
+            _atlas[key] = entry
+            _atlas_stats["bytes"] += size
+            while _atlas_stats["bytes"] > ATLAS_BUDGET_BYTES and len(_atlas) > 1:
+                _, (old_mask, _) = _atlas.popitem(last=False)
+                _atlas_stats["bytes"] -= old_mask.width * old_mask.height
+    return entry
+
+def draw_glyph(draw, xy, ch, font, fill, angle=0.0, origin=(0, 0)):
+    """
+    draw.text(xy, ch, font=font, fill=fill) 와 같지만 아틀라스의 마스크를 찍습니다.
+    origin: draw 가 그리는 영역의 좌상단. xy 를 전체 캔버스 기준으로 픽셀에 맞춘 뒤 옮기므로
+    영역(띠)으로 나눠 그려도 전체를 한 번에 그린 것과 같습니다.
+    """
+    x, y = xy
+    ox, oy = origin
+    if not angle and y < 0 and _fixed(y)[1] <= -32:
+        # 캔버스 위쪽 밖의 이 위치는 FreeType 이 정수 이동과 다른 비트맵을 만들므로 그대로 그림
+        draw.text((x - ox, y - oy), ch, font=font, fill=fill)
+        return
+    mask, (dx, dy) = get_glyph_mask(font, ch, angle)
+    if angle:
+        draw.bitmap((_pixel_x(x + dx) - ox, _pixel_y(y + dy) - oy), mask, fill=fill)
+    else:
+        draw.bitmap((_pixel_x(x) + dx - ox, _pixel_y(y) + dy - oy), mask, fill=fill)
+
+# draw.text 의 소수 좌표 처리와 같은 정수 위치 (round() 는 짝수 쪽 반올림이라 .5 에서 1px 어긋남)
+# Pillow 는 정수 부분(int)과 소수 부분을 나눠 소수 부분을 FreeType 의 1/64 픽셀 단위로 넘기고,
+# FreeType 은 그것을 반올림해 픽셀에 맞춤 (가로는 .5 를 올리고, y 축이 반대인 세로는 .5 를 내림)
+def _fixed(v):
+    i = int(v)
+    f = v - i
+    return i, int(math.copysign(math.floor(abs(f) * 64 + 0.5), f))
+
+def _pixel_x(v):
+    i, q = _fixed(v)
+    return i + ((q + 32) >> 6)
+
+def _pixel_y(v):
+    i, q = _fixed(v)
+    return i - ((32 - q) >> 6)
+
+def atlas_info():
+    """아틀라스 적중/실패 횟수와 사용 중인 바이트 수"""
+    with _atlas_lock:
+        return dict(_atlas_stats, entries=len(_atlas), budget=ATLAS_BUDGET_BYTES)
+
+def clear_atlas():
+    with _atlas_lock:
+        _atlas.clear()
+        _atlas_stats.update(hits=0, misses=0, bytes=0)
@@ -0,0 +1,353 @@
+"""
+폰트 레지스트리.
+
+동봉 폰트 폴더와 OS/사용자 폰트 폴더를 훑어 폰트마다 패밀리/스타일, 한글·한자 지원 여부,
+cmap 이 다루는 문자 범위를 기록하고 디스크 인덱스(JSON)에 보관합니다.
+인덱스 항목은 파일 수정 시각/크기가 같으면 그대로 재사용하므로, 시작할 때는 인덱스만 읽고
+바뀐 파일만 다시 파싱합니다. 파싱은 필요한 테이블(name, cmap)만 struct 로 직접 읽습니다.
+"""
+from collections import namedtuple
+from threading import Lock
+import json
+import os
+import struct
+import sys
+import uuid
+
+from stamp_cache import default_cache_dir
+from stamp_render import base_path, fonts
+
+FONT_EXTENSIONS = (".ttf", ".otf", ".ttc", ".otc")
+# 인덱스 형식이 바뀌면 올려서 예전 인덱스를 무시
+INDEX_VERSION = 1
+INDEX_FILENAME = "fonts.json"
+
+# KS X 1001 완성형 기준: 한글 2350자, 한자 4888자 이상이면 "지원" 으로 봄
+HANGUL_RANGE = (0xAC00, 0xD7A3)
+HANJA_RANGE = (0x4E00, 0x9FFF)
+KS_HANGUL_COUNT = 2350
+KS_HANJA_COUNT = 4888
+
+FontEntry = namedtuple(
+    "FontEntry",
+    ["path", "label", "family", "style", "hangul", "hanja", "bundled"],
+)
+FontEntry.__doc__ = "레지스트리의 폰트 한 개. hangul/hanja 는 KS X 1001 수준으로 지원하는지 여부"
+
+# --- 폰트 폴더 ---
+def font_dirs():
+    """동봉 폴더 다음에 OS 폰트 폴더, 사용자 폰트 폴더 순서 (존재하는 것만)"""
+    home = os.path.expanduser("~")
+    if sys.platform.startswith('win'):
+        windir = os.environ.get("WINDIR", r"C:\Windows")
+        local = os.environ.get("LOCALAPPDATA") or home
+        dirs = [os.path.join(windir, "Fonts"),
+                os.path.join(local, "Microsoft", "Windows", "Fonts")]
+    elif sys.platform == 'darwin':
+        dirs = ["/System/Library/Fonts", "/Library/Fonts",
+                os.path.join(home, "Library", "Fonts")]
+    else:
+        data_home = os.environ.get("XDG_DATA_HOME") or os.path.join(home, ".local", "share")
+        dirs = ["/usr/share/fonts", "/usr/local/share/fonts",
+                os.path.join(data_home, "fonts"), os.path.join(home, ".fonts")]
+    return [d for d in [base_path] + dirs if os.path.isdir(d)]
+
+def _iter_font_files(directory, recursive):
+    try:
+        with os.scandir(directory) as it:
+            for e in it:
+                try:
+                    if e.is_dir(follow_symlinks=False):
+                        if recursive:
+                            yield from _iter_font_files(e.path, True)
+                    elif e.name.lower().endswith(FONT_EXTENSIONS):
+                        yield e.path
+                except OSError:
+                    continue
+    except OSError:
+        return
+
+# --- sfnt 파싱 (name / cmap 테이블만) ---
+def _table_directory(f):
+    """{태그: (오프셋, 길이)}. 컬렉션(.ttc)은 첫 번째 글꼴만 봅니다."""
+    head = f.read(12)
+    if len(head) < 12:
+        raise ValueError("폰트 파일이 아닙니다.")
+    if head[:4] == b"ttcf":
+        (offset,) = struct.unpack(">I", f.read(4))
+        f.seek(offset)
+        head = f.read(12)
+    if head[:4] not in (b"\x00\x01\x00\x00", b"OTTO", b"true"):
+        raise ValueError("지원하지 않는 폰트 형식입니다.")
+    (num_tables,) = struct.unpack(">H", head[4:6])
+    data = f.read(16 * num_tables)
+    tables = {}
+    for i in range(num_tables):
+        tag, _, offset, length = struct.unpack(">4sIII", data[16*i:16*i + 16])
+        tables[tag.decode("latin-1")] = (offset, length)
+    return tables
+
+def _read_table(f, tables, tag):
+    if tag not in tables:
+        return b""
+    offset, length = tables[tag]
+    f.seek(offset)
+    return f.read(length)
+
+# (플랫폼, 언어) 우선순위: Windows 한국어 > Windows 영어 > 그 밖의 Windows > Mac
+def _name_rank(platform, lang):
+    if platform == 3:
+        return 0 if lang == 0x0412 else 1 if lang == 0x0409 else 2
+    return 3 if platform == 1 else 4
+
+def _parse_names(data):
+    """(패밀리, 스타일). 타이포그래픽 이름(16/17)이 있으면 우선"""
+    if len(data) < 6:
+        return "", ""
+    _, count, string_offset = struct.unpack(">HHH", data[:6])
+    best = {}
+    for i in range(count):
+        rec = data[6 + 12*i:18 + 12*i]
+        if len(rec) < 12:
+            break
+        platform, encoding, lang, name_id, length, offset = struct.unpack(">HHHHHH", rec)
+        if name_id not in (1, 2, 16, 17) or platform not in (1, 3):
+            continue
+        raw = data[string_offset + offset:string_offset + offset + length]
+        try:
+            text = raw.decode("utf-16-be") if platform == 3 else raw.decode("mac_roman")
+        except UnicodeDecodeError:
+            continue
+        rank = _name_rank(platform, lang)
+        if text and (name_id not in best or rank < best[name_id][0]):
+            best[name_id] = (rank, text.strip())
+    family = (best.get(16) or best.get(1) or (0, ""))[1]
+    style = (best.get(17) or best.get(2) or (0, ""))[1]
+    return family, style
+
+def _cmap_format4(data, offset):
+    seg_count = struct.unpack(">H", data[offset + 6:offset + 8])[0] // 2
+    ends = struct.unpack(f">{seg_count}H", data[offset + 14:offset + 14 + 2*seg_count])
+    base = offset + 16 + 2*seg_count
+    starts = struct.unpack(f">{seg_count}H", data[base:base + 2*seg_count])
+    range_base = base + 4*seg_count
+    range_offsets = struct.unpack(f">{seg_count}H", data[range_base:range_base + 2*seg_count])
+    ranges = []
+    for i, (start, end, ro) in enumerate(zip(starts, ends, range_offsets)):
+        if start == 0xFFFF:
+            continue
+        if ro == 0:
+            ranges.append((start, end))
+            continue
+        # glyphIdArray 를 거치는 구간은 글리프 0(없음)으로 가는 글자를 뺌
+        pos = range_base + 2*i + ro
+        for c in range(start, end + 1):
+            p = pos + 2*(c - start)
+            if p + 2 <= len(data) and struct.unpack(">H", data[p:p + 2])[0]:
+                ranges.append((c, c))
+    return ranges
+
+def _cmap_format12(data, offset):
+    (n_groups,) = struct.unpack(">I", data[offset + 12:offset + 16])
+    ranges = []
+    for i in range(n_groups):
+        p = offset + 16 + 12*i
+        start, end, _ = struct.unpack(">III", data[p:p + 12])
+        ranges.append((start, end))
+    return ranges
+
+def _parse_cmap(data):
+    """유니코드 cmap 이 다루는 문자 범위 [(시작, 끝), ...] (정렬, 병합됨)"""
+    if len(data) < 4:
+        return []
+    (count,) = struct.unpack(">H", data[2:4])
+    subtables = {}
+    for i in range(count):
+        platform, encoding, offset = struct.unpack(">HHI", data[4 + 8*i:12 + 8*i])
+        subtables[(platform, encoding)] = offset
+    # 전체 유니코드(format 12) 를 먼저, 없으면 BMP(format 4)
+    for key in ((3, 10), (0, 6), (0, 4), (3, 1), (0, 3), (0, 1), (0, 0)):
+        offset = subtables.get(key)
+        if offset is None:
+            continue
+        (fmt,) = struct.unpack(">H", data[offset:offset + 2])
+        if fmt == 12:
+            return merge_ranges(_cmap_format12(data, offset))
+        if fmt == 4:
+            return merge_ranges(_cmap_format4(data, offset))
+    return []
+
+def merge_ranges(ranges):
+    merged = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            if end > merged[-1][1]:
+                merged[-1][1] = end
+        else:
+            merged.append([start, end])
+    return merged
+
+def count_in_range(ranges, lo, hi):
+    """ranges 중 [lo, hi] 에 들어가는 문자 수"""
+    return sum(max(0, min(e, hi) - max(s, lo) + 1) for s, e in ranges)
+
+def read_font_info(path):
+    """폰트 파일 한 개의 인덱스 항목 (family, style, hangul, hanja, ranges)"""
+    with open(path, "rb") as f:
+        tables = _table_directory(f)
+        family, style = _parse_names(_read_table(f, tables, "name"))
+        ranges = _parse_cmap(_read_table(f, tables, "cmap"))
+    if not family:
+        family = os.path.splitext(os.path.basename(path))[0]
+    return {
+        "family": family,
+        "style": style,
+        "hangul": count_in_range(ranges, *HANGUL_RANGE),
+        "hanja": count_in_range(ranges, *HANJA_RANGE),
+        "ranges": ranges,
+    }
+
+# --- 레지스트리 ---
+class FontRegistry:
+    """
+    폰트 인덱스. load() 는 디스크 인덱스만 읽고(파싱 없음), refresh() 는 폴더를 훑어
+    수정 시각/크기가 바뀐 파일만 다시 파싱한 뒤 인덱스를 저장합니다. 스레드 안전합니다.
+    """
+
+    def __init__(self, index_path=None, dirs=None):
+        self.index_path = index_path
+        self.dirs = dirs
+        self._lock = Lock()
+        self._records = {}
+        # 동봉 폰트는 파일 이름 대신 기존 표시 이름을 사용
+        self._bundled = {os.path.normcase(os.path.abspath(p)): label for p, label in fonts}
+
+    def load(self):
+        """디스크 인덱스를 읽습니다. 없거나 형식이 다르면 빈 레지스트리로 시작"""
+        if not self.index_path:
+            return self
+        try:
+            with open(self.index_path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return self
+        if data.get("version") == INDEX_VERSION:
+            with self._lock:
+                self._records = data.get("fonts", {})
+        return self
+
+    def refresh(self):
+        """폴더를 다시 훑어 인덱스를 갱신합니다. 바뀐 것이 있으면 True"""
+        with self._lock:
+            old = dict(self._records)
+        dirs = self.dirs if self.dirs is not None else font_dirs()
+        records = {}
+        changed = False
+        for d in dirs:
+            # 동봉 폴더는 프로그램 파일과 섞여 있으므로 하위 폴더까지는 보지 않음
+            recursive = os.path.normcase(os.path.abspath(d)) != os.path.normcase(os.path.abspath(base_path))
+            for path in _iter_font_files(d, recursive):
+                if path in records:
+                    continue
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                rec = old.get(path)
+                if rec is None or rec["mtime_ns"] != st.st_mtime_ns or rec["size"] != st.st_size:
+                    try:
+                        rec = read_font_info(path)
+                    except (OSError, ValueError, struct.error):
+                        continue
+                    rec.update(mtime_ns=st.st_mtime_ns, size=st.st_size)
+                    changed = True
+                records[path] = rec
+        if changed or records.keys() != old.keys():
+            with self._lock:
+                self._records = records
+            self.save()
+            return True
+        return False
+
+    def save(self):
+        if not self.index_path:
+            return
+        with self._lock:
+            data = json.dumps({"version": INDEX_VERSION, "fonts": self._records},
+                              ensure_ascii=False, separators=(",", ":"))
+        tmp = f"{self.index_path}.{uuid.uuid4().hex}.tmp"
+        try:
+            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp, self.index_path)
+        except OSError:
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+    def record(self, path):
+        """인덱스 원본 항목 (없으면 None)"""
+        with self._lock:
+            return self._records.get(path)
+
+    def entries(self, hangul_only=False):
+        """
+        FontEntry 목록. 동봉 폰트(fonts 순서) 다음에 나머지를 패밀리/스타일 순으로.
+        인덱스가 아직 없으면 동봉 폰트 목록을 그대로 돌려줍니다.
+        """
+        with self._lock:
+            records = dict(self._records)
+        by_key = {os.path.normcase(os.path.abspath(p)): (p, rec) for p, rec in records.items()}
+        result = []
+        for path, label in fonts:
+            found = by_key.get(os.path.normcase(os.path.abspath(path)))
+            if found:
+                rec = found[1]
+                result.append(FontEntry(path, label, rec["family"], rec["style"],
+                                        rec["hangul"] >= KS_HANGUL_COUNT,
+                                        rec["hanja"] >= KS_HANJA_COUNT, True))
+            elif not records and os.path.exists(path):
+                # 첫 실행(인덱스 없음): 파싱 전이므로 지원 여부는 가정
+                result.append(FontEntry(path, label, label, "", True, False, True))
+        others = []
+        for key, (path, rec) in by_key.items():
+            if key in self._bundled:
+                continue
+            hangul = rec["hangul"] >= KS_HANGUL_COUNT
+            if hangul_only and not hangul:
+                continue
+            label = f'{rec["family"]} ({rec["style"]})' if rec["style"] else rec["family"]
+            others.append(FontEntry(path, label, rec["family"], rec["style"], hangul,
+                                    rec["hanja"] >= KS_HANJA_COUNT, False))
+        others.sort(key=lambda e: (e.family.lower(), e.style.lower(), e.path))
+        return result + others
+
+_default_registry = None
+_default_registry_lock = Lock()
+
+def get_font_registry():
+    """기본 레지스트리 (캐시 폴더의 fonts.json). 처음 부를 때 인덱스만 읽습니다."""
+    global _default_registry
+    with _default_registry_lock:
+        if _default_registry is None:
+            _default_registry = FontRegistry(os.path.join(default_cache_dir(), INDEX_FILENAME)).load()
+        return _default_registry
+
+def font_ranges(path):
+    """
+    path 의 cmap 범위. 기본 레지스트리 인덱스 항목이 파일과 같으면(수정 시각/크기) 파싱 없이 돌려줍니다.
+    파일을 읽을 수 없으면 None
+    """
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    rec = get_font_registry().record(path)
+    if rec and rec["mtime_ns"] == st.st_mtime_ns and rec["size"] == st.st_size:
+        return rec["ranges"]
+    try:
+        return read_font_info(path)["ranges"]
+    except (OSError, ValueError, struct.error):
+        return None
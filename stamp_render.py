@@ -0,0 +1,869 @@
+"""
+도장 렌더링 코어.
+
+Tk 없이 import 할 수 있는 순수 렌더링 API 입니다.
+StampSpec(해시 가능한 입력값 묶음)을 받아 PIL.Image 를 돌려주며,
+전역 상태를 건드리지 않으므로 여러 스레드/프로세스에서 동시에 호출해도 안전합니다.
+"""
+from collections import OrderedDict, namedtuple
+from functools import lru_cache
+from itertools import groupby
+from threading import Lock
+import math
+import os
+import sys
+
+from PIL import Image, ImageColor, ImageDraw
+
+from stamp_fonts import (
+    draw_glyph, fallback_fonts_for, get_font, get_glyph_metrics, metrics_with_fallback,
+)
+from stamp_trace import span
+
+# --- 리소스 경로 처리 ---
+if getattr(sys, 'frozen', False):
+    base_path = sys._MEIPASS
+else:
+    base_path = os.path.dirname(os.path.abspath(__file__))
+
+# --- 사용자 폰트 목록 및 경로 리스트 ---
+fonts = [
+    (os.path.join(base_path, "HJ한전서A.ttf"), "HJ한전서A"),
+    (os.path.join(base_path, "HJ한전서B.ttf"), "HJ한전서B"),
+    (os.path.join(base_path, "malgun.ttf"), "맑은 고딕 (일반)"),
+    (os.path.join(base_path, "malgunbd.ttf"), "맑은 고딕 (볼드)"),
+    (os.path.join(base_path, "NanumMyeongjo.ttf"), "나눔명조 (일반)"),
+    (os.path.join(base_path, "NanumMyeongjoBold.ttf"), "나눔명조 (볼드)"),
+    (os.path.join(base_path, "NanumMyeongjoExtraBold.ttf"), "나눔명조 (엑스트라볼드)"),
+]
+
+# --- 상수들 ---
+STAMP_TYPES = [
+    "원형", "정사각형", "엣지 있는 정사각형",
+    "직사각형", "엣지 있는 직사각형", "문자 to 도장모양"
+]
+
+SUB_STAMP_SHAPES = [
+    "원", "정사각", "직사각(가로)", "직사각(세로)", "타원형(가로)", "타원형(세로)"
+]
+
+SUB_STAMP_SHAPES_CIRCLE = ["원", "타원형(가로)", "타원형(세로)"]
+SUB_STAMP_SHAPES_RECT = ["정사각", "직사각(가로)", "직사각(세로)"]
+
+TEXT_DIRECTIONS = [
+    "좌->우", "상->하", "조선체 스타일"
+]
+
+# 줄간격 배율: 0.9(좁게),1.0(보통),1.2(넉넉)
+LINE_SPACINGS = {"좁게": 0.9, "보통": 1.0, "넉넉": 1.2}
+
+IMG_SIZE = 400
+BORDER_WIDTH = 5
+MIN_STAMP_SIZE = 50
+# GUI 에서 고를 수 있는 범위. 외부 입력(일괄 생성, 서버)도 이 범위만 받음
+MIN_FONT_SIZE, MAX_FONT_SIZE = 1, 150
+MAX_LINE_COUNT = 6
+MIN_LINE_SPACING, MAX_LINE_SPACING = 0.5, 3.0
+# 마스크에 그리는 값 (완전히 덮임). 색은 colorize() 에서 입힘
+MASK_INK = 255
+
+# 선택한 폰트에 없는 글자를 그릴 대체 폰트 순서 (선택한 폰트 자신은 건너뜀)
+FALLBACK_FONTS = tuple(path for path, _ in fonts)
+
+# --- 도장 입력값 묶음 ---
+# 해시 가능한 namedtuple 이므로 캐시 키나 프로세스 간 전달에 그대로 사용할 수 있습니다.
+StampSpec = namedtuple(
+    "StampSpec",
+    ["text", "font_path", "font_size", "width", "height", "stamp_type",
+     "sub_shape", "direction", "line_count", "line_spacing", "color", "rotate_glyphs",
+     "fallback_fonts", "ink_effect", "ink_seed"],
+    defaults=(fonts[0][0], 80, IMG_SIZE, IMG_SIZE, STAMP_TYPES[0],
+              "", TEXT_DIRECTIONS[0], 1, 1.0, "#FF0000", False, FALLBACK_FONTS, 0.0, 0),
+)
+
+def check_spec_ranges(spec):
+    """글자 크기 / 줄 수 / 줄간격이 허용 범위 밖이면 ValueError"""
+    if not MIN_FONT_SIZE <= spec.font_size <= MAX_FONT_SIZE:
+        raise ValueError(f"글자 크기는 {MIN_FONT_SIZE}~{MAX_FONT_SIZE} 이어야 합니다: {spec.font_size}")
+    if not 1 <= spec.line_count <= MAX_LINE_COUNT:
+        raise ValueError(f"줄 수는 1~{MAX_LINE_COUNT} 이어야 합니다: {spec.line_count}")
+    # nan 은 비교가 모두 거짓이므로 여기서 걸러짐
+    if not MIN_LINE_SPACING <= spec.line_spacing <= MAX_LINE_SPACING:
+        raise ValueError(f"줄간격은 {MIN_LINE_SPACING}~{MAX_LINE_SPACING} 배여야 합니다: {spec.line_spacing}")
+
+# --- 입력값 해석 보조 함수들 ---
+def parse_font_size(text):
+    """"60 (추천)" -> 60"""
+    return int(str(text).split()[0])
+
+def parse_size(text, custom_w="", custom_h=""):
+    """
+    크기 콤보 문자열("400x400 (기본)", "사용자 지정")을 (width, height) 로 변환합니다.
+    해석에 실패하면 기본 크기(IMG_SIZE)를 돌려줍니다.
+    """
+    try:
+        if text and text != "사용자 지정":
+            w, h = map(int, text.split()[0].split('x'))
+            return w, h
+        cw = str(custom_w).strip()
+        ch = str(custom_h).strip()
+        if cw and ch:
+            return max(MIN_STAMP_SIZE, int(cw)), max(MIN_STAMP_SIZE, int(ch))
+    except Exception:
+        pass
+    return IMG_SIZE, IMG_SIZE
+
+def parse_line_spacing(text):
+    return LINE_SPACINGS.get(text, 1.2 if text else 1.0)
+
+def canvas_size(spec):
+    """도장 종류에 따른 실제 캔버스 크기 (직사각형 계열은 가로 기준 0.7 비율 유지)"""
+    if spec.stamp_type in ["직사각형", "엣지 있는 직사각형"]:
+        return spec.width, int(spec.width * 0.7)
+    return spec.width, spec.height
+
+def scaled_size(spec, scale=1.0):
+    """scale 배율로 렌더링할 때의 출력 이미지 크기"""
+    width, height = canvas_size(spec)
+    if scale == 1:
+        return width, height
+    return max(1, int(round(width * scale))), max(1, int(round(height * scale)))
+
+def preview_scale(spec, max_side):
+    """긴 변이 max_side 를 넘지 않게 하는 축소 배율 (확대는 하지 않음)"""
+    width, height = canvas_size(spec)
+    return min(1.0, max_side / max(width, height))
+
+# --- 배치 결과 ---
+# 배치(어디에 어떤 글자를 놓을지)와 래스터화(그리기)를 분리해, 색상/형식만 바뀌는 경우
+# 배치를 다시 계산하지 않도록 합니다. 래스터/벡터 출력이 모두 같은 StampLayout 을 사용합니다.
+LAYOUT_CACHE_SIZE = 128
+
+class GlyphPlacement:
+    """
+    글자(또는 좌->우 문자열) 하나의 배치. x, y 는 draw.text 에 넘길 좌상단 좌표 (원본 크기 기준)
+    font_path: 대체 폰트로 그릴 때의 폰트 경로 (None 이면 StampLayout.font_path)
+    """
+    __slots__ = ("glyph", "x", "y", "font_size", "rotation", "font_path")
+
+    def __init__(self, glyph, x, y, font_size, rotation=0.0, font_path=None):
+        self.glyph = glyph
+        self.x = x
+        self.y = y
+        self.font_size = font_size
+        self.rotation = rotation
+        self.font_path = font_path
+
+    def __repr__(self):
+        return (f"GlyphPlacement({self.glyph!r}, {self.x}, {self.y}, {self.font_size}, "
+                f"{self.rotation}, {self.font_path!r})")
+
+class StampLayout:
+    """
+    도장 한 개의 배치 결과. 여러 스레드가 공유하므로 만든 뒤에는 수정하지 않습니다.
+    glyphs: GlyphPlacement 튜플
+    borders: border_shapes() 결과 (문자 to 도장모양은 빈 튜플)
+    fallback: 대체 폰트로 그린 글자 문자열, missing: 어느 폰트에도 없어 빈 네모로 그려지는 글자 문자열
+    """
+    __slots__ = ("width", "height", "font_path", "font_size", "glyphs", "borders", "fallback", "missing")
+
+    def __init__(self, width, height, font_path, font_size, glyphs, borders, fallback="", missing=""):
+        self.width = width
+        self.height = height
+        self.font_path = font_path
+        self.font_size = font_size
+        self.glyphs = tuple(glyphs)
+        self.borders = tuple(borders)
+        self.fallback = fallback
+        self.missing = missing
+
+def layout_key(spec):
+    """배치에 영향을 주는 값만 남긴 spec (색상/잉크 효과 제외, 해당 도장 종류에서 안 쓰는 값은 기본값으로)"""
+    key = spec._replace(text=spec.text.strip(), color="", ink_effect=0.0, ink_seed=0)
+    if spec.stamp_type == "문자 to 도장모양":
+        key = key._replace(direction="")
+        if normalize_shape(spec.sub_shape) not in RING_SHAPES:
+            key = key._replace(rotate_glyphs=False)
+        return key
+    if spec.stamp_type != "원형":
+        key = key._replace(sub_shape="")
+    return key._replace(line_count=1, line_spacing=1.0, rotate_glyphs=False)
+
+def font_signatures(spec):
+    """spec 이 쓰는 폰트/대체 폰트 파일의 (수정 시각, 크기). 파일이 바뀌면 배치 캐시 키도 바뀜"""
+    # stamp_cache -> stamp_render 순환을 피하려고 여기서 import
+    from stamp_cache import font_signature
+    return tuple(font_signature(path) for path in (spec.font_path, *spec.fallback_fonts))
+
+def get_layout(spec):
+    """spec 의 배치 결과 (캐시됨). 입력이 잘못된 경우 ValueError 를 발생시킵니다."""
+    return _cached_layout(layout_key(spec), font_signatures(spec))
+
+@lru_cache(maxsize=LAYOUT_CACHE_SIZE)
+def _cached_layout(key, signatures):
+    return compute_layout(key, signatures)
+
+def compute_layout(spec, signatures=None):
+    """
+    글자 배치와 외곽선 도형을 계산합니다 (원본 크기 기준 좌표, 캐시 없음).
+    signatures: font_signatures(spec) (자동 맞춤 캐시 키, 없으면 여기서 구함)
+    입력이 잘못된 경우 ValueError 를 발생시킵니다.
+    """
+    name = spec.text.strip()
+    if not name:
+        raise ValueError("이름을 입력하세요.")
+
+    width, height = canvas_size(spec)
+    # 래스터화 전에 글자 지원 여부를 확인하고, 없는 글자는 대체 폰트로
+    with span("coverage"):
+        fallback, missing = fallback_fonts_for(name, spec.font_path, spec.fallback_fonts)
+
+    if spec.stamp_type == "문자 to 도장모양":
+        if not spec.sub_shape:
+            raise ValueError("서브 모양을 선택하세요.")
+        # 문자 to 도장모양은 도장 외곽 없음, 글자만 도장형태에 맞게 배치
+        shape = normalize_shape(spec.sub_shape)
+        line_count = clamp_line_count(spec.line_count)
+        with span("fit"):
+            if signatures is None:
+                signatures = font_signatures(spec)
+            size = _cached_fit(name, spec.font_path, spec.font_size, width, height, shape, line_count,
+                               spec.line_spacing, spec.rotate_glyphs, tuple(sorted(fallback.items())),
+                               signatures)
+        with span("place"):
+            metrics = metrics_with_fallback(spec.font_path, size, fallback)
+            placed = layout_text_to_stamp_shape(name, metrics, width, height, shape,
+                                                line_count, spec.line_spacing, spec.rotate_glyphs)
+        glyphs = [GlyphPlacement(ch, x, y, size, rot, fallback.get(ch)) for ch, x, y, rot in placed]
+        borders = ()
+    else:
+        # 글자 방향에 따라 텍스트 배치 (기존 방식 유지)
+        size = spec.font_size
+        with span("place"):
+            font = get_font(spec.font_path, size)
+            metrics = metrics_with_fallback(spec.font_path, size, fallback)
+            if spec.direction == "좌->우":
+                placed = layout_text_left_to_right(name, font, width, height, metrics, fallback)
+            elif spec.direction == "상->하":
+                placed = layout_text_top_to_bottom(name, font, width, height, metrics)
+            else:
+                placed = layout_text_joseon_style(name, font, width, height, metrics)
+        glyphs = [GlyphPlacement(ch, x, y, size, font_path=fallback.get(ch[:1])) for ch, x, y in placed]
+        borders = border_shapes(spec.stamp_type, spec.sub_shape, width, height)
+
+    return StampLayout(width, height, spec.font_path, size, glyphs, borders,
+                       "".join(fallback), missing)
+
+# 자동 맞춤 결과(폰트 크기 하나)는 배치보다 훨씬 작으므로 더 많이 보관
+FIT_CACHE_SIZE = 1024
+
+@lru_cache(maxsize=FIT_CACHE_SIZE)
+def _cached_fit(text, font_path, base_font_size, width, height, shape, line_count, line_spacing, rotate,
+                fallback_items, signatures):
+    # signatures: 캐시 키로만 씀 (폰트 파일이 바뀌면 다시 맞춤)
+    return fit_font_size(text, font_path, base_font_size, width, height, shape, line_count, line_spacing,
+                         rotate, dict(fallback_items))
+
+def layout_cache_info():
+    return _cached_layout.cache_info()
+
+def clear_layout_cache():
+    """배치 캐시와 자동 맞춤 캐시를 비웁니다."""
+    _cached_layout.cache_clear()
+    _cached_fit.cache_clear()
+
+# --- 도장 렌더링 ---
+def render_stamp(spec, scale=1.0):
+    """
+    spec: StampSpec
+    scale: 출력 배율. 미리보기는 1 보다 작게 주면 원본 크기로 그리지 않고 바로 축소 렌더링합니다.
+    반환: 투명 배경의 RGBA PIL.Image (img.info["font_size"] 에 실제 사용한 폰트 크기)
+    입력이 잘못된 경우 ValueError 를 발생시킵니다.
+    """
+    return colorize(render_mask(spec, scale), spec.color)
+
+def render_mask(spec, scale=1.0):
+    """
+    render_stamp 와 같지만 색을 입히지 않은 "L" 모드 덮임(coverage) 마스크를 돌려줍니다.
+    외곽선과 글자를 각각 단계 캐시(border_raster / glyph_raster)에서 가져와 합칩니다.
+    """
+    with span("layout"):
+        layout = get_layout(spec)
+    size = scaled_size(spec, scale)
+    border = border_raster(layout, size, scale)
+    glyphs = glyph_raster(spec, layout, size, scale)
+    with span("compose"):
+        if border is None:
+            mask = glyphs.copy()
+        else:
+            # 외곽선 위에 글자를 찍는 것과 같은 합성 (덮임 비율만큼 MASK_INK 쪽으로)
+            mask = border.copy()
+            mask.paste(MASK_INK, (0, 0) + size, glyphs)
+    _set_layout_info(mask, layout)
+    if spec.ink_effect:
+        mask = _apply_ink(spec, mask, scale, (0, 0))
+    return mask
+
+def render_stamp_region(spec, region, scale=1.0, layout=None):
+    """render_mask_region 결과에 spec.color 를 입힌 RGBA 이미지"""
+    return colorize(render_mask_region(spec, region, scale, layout), spec.color)
+
+def render_mask_region(spec, region, scale=1.0, layout=None):
+    """
+    scale 배율로 렌더링한 도장 중 region=(left, top, right, bottom) 영역만 "L" 마스크로 그립니다.
+    큰 출력물을 띠(strip) 단위로 나눠 그릴 때 사용하며, 메모리는 영역 크기에만 비례합니다.
+    도장은 한 가지 색이므로 색은 미리보기/저장할 때 colorize() 로 입힙니다 (픽셀당 1바이트).
+    layout: 미리 구한 StampLayout (없으면 get_layout(spec))
+    """
+    if layout is None:
+        with span("layout"):
+            layout = get_layout(spec)
+    if spec.ink_effect:
+        return _ink_region(spec, region, scale, layout)
+    left, top, right, bottom = region
+    origin = (left, top)
+
+    mask = Image.new("L", (right - left, bottom - top), 0)
+    draw = ImageDraw.Draw(mask)
+    with span("draw_border"):
+        draw_border(draw, layout.borders, MASK_INK, scale, origin)
+    with span("draw_glyphs"):
+        draw_placed_glyphs(draw, layout, MASK_INK, scale, origin)
+    _set_layout_info(mask, layout)
+    return mask
+
+# --- 잉크/닳음 효과 (stamp_effects, NumPy 필요) ---
+def _apply_ink(spec, mask, scale, origin):
+    from stamp_effects import apply_ink_effect
+    with span("ink_effect"):
+        return apply_ink_effect(mask, spec.ink_effect, spec.ink_seed, canvas_size(spec), scale, origin)
+
+def _ink_region(spec, region, scale, layout):
+    # 침식/흐림이 영역 경계 밖 픽셀도 보도록 둘레를 더 그린 뒤 효과를 입히고 잘라냄
+    from stamp_effects import effect_padding
+    pad = effect_padding(scale)
+    out_w, out_h = scaled_size(spec, scale)
+    left, top, right, bottom = region
+    padded = (max(0, left - pad), max(0, top - pad), min(out_w, right + pad), min(out_h, bottom + pad))
+    mask = render_mask_region(spec._replace(ink_effect=0.0), padded, scale, layout)
+    mask = _apply_ink(spec, mask, scale, padded[:2])
+    dx, dy = left - padded[0], top - padded[1]
+    out = mask.crop((dx, dy, dx + right - left, dy + bottom - top))
+    out.info.update(mask.info)
+    return out
+
+def _set_layout_info(mask, layout):
+    # 자동 맞춤으로 줄어든 폰트 크기, 대체 폰트/빈 네모 글자를 UI 에 알려주기 위해 info 에 기록
+    mask.info["font_size"] = layout.font_size
+    if layout.fallback:
+        mask.info["fallback_glyphs"] = layout.fallback
+    if layout.missing:
+        mask.info["missing_glyphs"] = layout.missing
+
+# --- 단계별 래스터 캐시 ---
+# 렌더링은 font -> metrics -> fit -> layout -> border raster -> glyph raster -> colorize -> preview
+# 순서의 단계로 나뉘고, 각 단계는 자기 입력으로만 캐시되어 바뀐 값의 아래쪽 단계만 다시 계산됩니다.
+#   font, metrics : stamp_fonts.get_font / get_glyph_metrics  ((폰트 경로, 크기))
+#   fit           : _cached_fit  (글자, 폰트, 크기, 모양, 줄 수/간격, 회전, 대체 폰트, 폰트 파일 서명)
+#   layout        : get_layout  (layout_key: 색을 뺀 배치 입력값, font_signatures: 폰트 파일 수정 시각/크기)
+#   border raster : border_raster  (외곽선 도형, 출력 크기) - 이름/폰트/줄간격이 바뀌어도 재사용
+#   glyph raster  : glyph_raster  (layout_key, 폰트 파일 서명, 출력 크기)
+#   ink effect    : stamp_effects.apply_ink_effect  (spec.ink_effect > 0 일 때, 노이즈는 캔버스 크기별 캐시, seed 는 읽는 위치만)
+#   colorize      : colorize  (마스크, 색) - 색만 바뀌면 이 단계부터
+#   preview       : Create Stamp.py 의 show_preview
+RASTER_STAGE_BYTES = 32 * 1024 * 1024
+
+_raster_stages = OrderedDict()
+_raster_lock = Lock()
+_raster_stats = {"hits": 0, "misses": 0, "bytes": 0}
+
+def _stage_get(key):
+    with _raster_lock:
+        img = _raster_stages.get(key)
+        if img is not None:
+            _raster_stages.move_to_end(key)
+            _raster_stats["hits"] += 1
+            return img
+        _raster_stats["misses"] += 1
+    return None
+
+def _stage_put(key, img):
+    with _raster_lock:
+        if key in _raster_stages:
+            return
+        _raster_stages[key] = img
+        _raster_stats["bytes"] += img.width * img.height
+        while _raster_stats["bytes"] > RASTER_STAGE_BYTES and len(_raster_stages) > 1:
+            _, old = _raster_stages.popitem(last=False)
+            _raster_stats["bytes"] -= old.width * old.height
+
+def border_raster(layout, size, scale=1.0):
+    """외곽선만 그린 "L" 마스크 (캐시됨, 수정 금지). 외곽선이 없으면 None"""
+    if not layout.borders:
+        return None
+    key = ("border", layout.borders, size, scale)
+    img = _stage_get(key)
+    if img is None:
+        with span("draw_border"):
+            img = Image.new("L", size, 0)
+            draw_border(ImageDraw.Draw(img), layout.borders, MASK_INK, scale)
+        _stage_put(key, img)
+    return img
+
+def glyph_raster(spec, layout, size, scale=1.0):
+    """layout 의 글자만 그린 "L" 마스크 (캐시됨, 수정 금지)"""
+    key = ("glyphs", layout_key(spec), font_signatures(spec), size, scale)
+    img = _stage_get(key)
+    if img is None:
+        with span("draw_glyphs"):
+            img = Image.new("L", size, 0)
+            draw_placed_glyphs(ImageDraw.Draw(img), layout, MASK_INK, scale)
+        _stage_put(key, img)
+    return img
+
+def raster_stage_info():
+    """외곽선/글자 래스터 캐시 적중/실패 횟수와 사용 중인 바이트 수"""
+    with _raster_lock:
+        return dict(_raster_stats, entries=len(_raster_stages), budget=RASTER_STAGE_BYTES)
+
+def clear_raster_stages():
+    with _raster_lock:
+        _raster_stages.clear()
+        _raster_stats.update(hits=0, misses=0, bytes=0)
+
+def colorize(mask, color):
+    """
+    "L" 마스크를 color 한 가지 색의 RGBA 이미지로 (마스크가 그대로 알파 채널).
+    info 는 마스크의 것을 복사합니다.
+    """
+    with span("colorize"):
+        img = Image.new("RGBA", mask.size, ImageColor.getrgb(color)[:3] + (0,))
+        img.putalpha(mask)
+    img.info.update(mask.info)
+    return img
+
+def draw_placed_glyphs(draw, layout, color, scale=1.0, origin=(0, 0)):
+    """
+    배치된 글자들을 scale 배율로 그립니다. 축소/확대 시 폰트도 같은 배율의 크기로 다시 고릅니다.
+    origin: 그리는 영역의 좌상단 (출력 좌표)
+    """
+    ox, oy = origin
+    if scale == 1 and origin == (0, 0):
+        for g in layout.glyphs:
+            font = get_font(g.font_path or layout.font_path, g.font_size)
+            draw_glyph(draw, (g.x, g.y), g.glyph, font, color, g.rotation)
+        return
+    region_h = draw.im.size[1]
+    for g in layout.glyphs:
+        font = get_font(g.font_path or layout.font_path, max(1, int(round(g.font_size * scale))))
+        gx, gy = g.x * scale, g.y * scale
+        # 영역 밖 글자는 래스터화하지 않음
+        b = get_glyph_metrics(font).bbox(g.glyph)
+        # 회전한 글자는 잉크 영역이 커질 수 있으므로 대각선 길이만큼 여유
+        margin = max(b[2] - b[0], b[3] - b[1]) if g.rotation else 0
+        if gy - oy + b[3] + margin < 0 or gy - oy + b[1] - margin > region_h:
+            continue
+        # 픽셀 맞춤은 전체 캔버스 좌표로 (영역 좌표로 하면 띠 경계에 걸친 글자가 1px 어긋남)
+        draw_glyph(draw, (gx, gy), g.glyph, font, color, g.rotation, origin)
+
+# --- 도장 외곽 그리기 ---
+def border_shapes(stamp_type, sub_shape, width, height):
+    """
+    도장 외곽선 도형 목록 (원본 크기 좌표). 래스터/벡터 출력이 같은 도형을 사용합니다.
+    각 항목: ("ellipse" | "rectangle", box) 또는 ("rounded_rectangle", box, radius)
+    선 두께는 모두 BORDER_WIDTH 입니다.
+    """
+    half = BORDER_WIDTH // 2
+    if stamp_type == "원형":
+        if sub_shape == "원":
+            return [("ellipse", (half, half, width-half, height-half))]
+        elif sub_shape == "타원형(가로)":
+            return [("ellipse", (half, height//4, width-half, height*3//4))]
+        elif sub_shape == "타원형(세로)":
+            return [("ellipse", (width//4, half, width*3//4, height-half))]
+    elif stamp_type in ["정사각형", "직사각형"]:
+        return [("rectangle", (half, half, width-half, height-half))]
+    elif stamp_type == "엣지 있는 정사각형":
+        return [("rounded_rectangle", (half, half, width-half, height-half), 30)]
+    elif stamp_type == "엣지 있는 직사각형":
+        return [("rounded_rectangle", (half, half, width-half, height-half), 20)]
+    return []
+
+def draw_border(draw, shapes, color, scale=1.0, origin=(0, 0)):
+    """border_shapes() 도형들을 scale 배율, origin 기준으로 그립니다."""
+    line_width = BORDER_WIDTH
+    ox, oy = origin
+
+    def box(left, top, right, bottom):
+        if scale == 1 and origin == (0, 0):
+            return (left, top, right, bottom)
+        # 출력 좌표의 정수 픽셀에 맞춘 뒤 옮김 (소수 좌표는 영역마다 다르게 래스터화되어 띠 경계가 어긋남)
+        return (round(left * scale) - ox, round(top * scale) - oy,
+                round(right * scale) - ox, round(bottom * scale) - oy)
+
+    if scale != 1:
+        line_width = max(1, int(round(BORDER_WIDTH * scale)))
+
+    for shape in shapes:
+        kind, shape_box = shape[0], box(*shape[1])
+        if kind == "ellipse":
+            draw.ellipse(shape_box, outline=color, width=line_width)
+        elif kind == "rectangle":
+            draw.rectangle(shape_box, outline=color, width=line_width)
+        elif kind == "rounded_rectangle":
+            draw_rounded_rectangle(draw, shape_box, round(shape[2] * scale), outline=color, width=line_width)
+
+# --- 문자 to 도장모양 글자 배치 함수 ---
+# 문자 to 도장모양에서 쓰는 여백 (기본 도장 외곽선 두께와 별개)
+SHAPE_BORDER_WIDTH = 20
+# 자동 맞춤 시 허용하는 최소 폰트 크기
+MIN_FIT_FONT_SIZE = 6
+# 둘레 배치(글자 회전 가능)를 쓰는 서브 모양
+RING_SHAPES = ("원형", "타원형(가로)", "타원형(세로)")
+
+def normalize_shape(shape):
+    shape = shape.strip()
+    return {"원": "원형", "원형": "원형",
+            "정사각": "정사각", "정사각형": "정사각",
+            "직사각(가로)": "직사각(가로)", "직사각(세로)": "직사각(세로)",
+            "타원형(가로)": "타원형(가로)", "타원형(세로)": "타원형(세로)"}.get(shape, shape)
+
+def clamp_line_count(line_count):
+    # 안전한 줄 수 범위
+    try:
+        line_count = int(line_count)
+    except Exception:
+        line_count = 1
+    return max(1, min(MAX_LINE_COUNT, line_count))
+
+# --- 원/타원 둘레 배치 ---
+# 각도를 균등하게 나누면 타원의 뾰족한 쪽에 글자가 몰리므로, 둘레 길이(arc length) 기준으로
+# 글자를 배치합니다. 타원마다 누적 둘레 길이 표를 한 번 만들어 두고 NumPy 로 한꺼번에 계산합니다.
+RING_TABLE_SAMPLES = 1024
+
+@lru_cache(maxsize=64)
+def _ring_arc_table(rx, ry):
+    """
+    (각도 배열, 누적 둘레 길이 배열). 각도는 -90도(맨 위)에서 시작해 시계 방향(화면 기준)으로 한 바퀴.
+    """
+    import numpy as np
+    theta = np.linspace(-math.pi / 2, 3 * math.pi / 2, RING_TABLE_SAMPLES + 1)
+    xs = rx * np.cos(theta)
+    ys = ry * np.sin(theta)
+    cumulative = np.concatenate(([0.0], np.cumsum(np.hypot(np.diff(xs), np.diff(ys)))))
+    return theta, cumulative
+
+def ring_positions(cx, cy, rx, ry, line_text, metrics):
+    """
+    line_text 의 글자들을 타원(rx, ry) 둘레에 같은 간격으로 놓았을 때 각 글자의 (중심 x, 중심 y, 회전 각도) 목록.
+    글자마다 advance 만큼 둘레를 차지하고 남는 길이를 글자 사이에 고르게 나눕니다.
+    첫 글자는 맨 위(-90도)에 놓입니다.
+    회전 각도는 글자 윗부분이 바깥(법선 방향)을 향하도록 하는 반시계 방향 각도(도, Image.rotate 기준)입니다.
+    """
+    import numpy as np
+    k = len(line_text)
+    if k == 0:
+        return []
+    theta, cumulative = _ring_arc_table(rx, ry)
+    total = cumulative[-1]
+
+    advances = np.fromiter((metrics.advance(ch) for ch in line_text), dtype=float, count=k)
+    gap = (total - advances.sum()) / k
+    # 글자 i 의 중심까지의 둘레 길이 (첫 글자 중심 = 0)
+    starts = np.concatenate(([0.0], np.cumsum(advances[:-1] + gap)))
+    centers = (starts + advances / 2 - advances[0] / 2) % total
+
+    angles = np.interp(centers, cumulative, theta)
+    # int() 와 같은 0 방향 버림
+    cos, sin = np.cos(angles), np.sin(angles)
+    xs = cx + (rx * cos).astype(int)
+    ys = cy + (ry * sin).astype(int)
+    # 타원의 바깥 법선 방향 (화면 좌표, y 아래쪽). 맨 위에서 -90도 -> 회전 0
+    normals = np.degrees(np.arctan2(sin / max(ry, 1), cos / max(rx, 1)))
+    rotations = -(normals + 90.0)
+    return list(zip(xs.tolist(), ys.tolist(), rotations.tolist()))
+
+def layout_text_to_stamp_shape(text, metrics, width, height, shape, line_count=1, line_spacing=1.0,
+                               rotate=False):
+    """
+    글자를 그리지 않고 위치만 계산합니다.
+    metrics: 사용할 폰트의 GlyphMetrics
+    shape: normalize_shape() 를 거친 값
+    rotate: 원/타원 둘레 글자를 접선 방향으로 회전 (다른 도형에서는 무시)
+    반환: [(글자, x, y, 회전 각도), ...]  (x, y 는 draw.text 에 넘길 좌상단 좌표)
+    """
+    BORDER_WIDTH = SHAPE_BORDER_WIDTH
+    n = len(text)
+    max_w, max_h = metrics.max_size(text)
+    placed = []
+
+    if shape == "원형":
+        cx, cy = width // 2, height // 2
+        base_radius = min(width, height) // 2 - BORDER_WIDTH - max(max_w, max_h)//2
+        base_radius = max(10, int(base_radius))
+
+        remaining = n
+        start_idx = 0
+        for line_idx in range(line_count):
+            remain_lines = line_count - line_idx
+            chars_this_line = max(1, math.ceil(remaining / remain_lines))
+            remaining -= chars_this_line
+
+            radius = base_radius - line_idx * int(max_h * 1.6 * line_spacing)
+            if radius < 8:
+                radius = 8
+
+            line_text = text[start_idx:start_idx + chars_this_line]
+            for ch, (x, y, rot) in zip(line_text, ring_positions(cx, cy, radius, radius, line_text, metrics)):
+                w, h = metrics.size(ch)
+                placed.append((ch, x - w//2, y - h//2, rot if rotate else 0.0))
+            start_idx += chars_this_line
+
+    elif shape in ("타원형(가로)", "타원형(세로)"):
+        cx, cy = width // 2, height // 2
+        rx = width // 2 - BORDER_WIDTH - max_w//2
+        ry = height // 2 - BORDER_WIDTH - max_h//2
+        remaining = n
+        start_idx = 0
+        for line_idx in range(line_count):
+            chars_this_line = max(1, math.ceil(remaining / (line_count - line_idx)))
+            remaining -= chars_this_line
+            inner_rx = rx - line_idx * int(max_h * 1.5 * line_spacing)
+            inner_ry = ry - line_idx * int(max_h * 1.5 * line_spacing)
+            if inner_rx < 4: inner_rx = 4
+            if inner_ry < 4: inner_ry = 4
+            line_text = text[start_idx:start_idx + chars_this_line]
+            for ch, (x, y, rot) in zip(line_text, ring_positions(cx, cy, inner_rx, inner_ry, line_text, metrics)):
+                w, h = metrics.size(ch)
+                placed.append((ch, x - w//2, y - h//2, rot if rotate else 0.0))
+            start_idx += chars_this_line
+
+    elif shape in ("정사각", "직사각(가로)"):
+        inner_left = BORDER_WIDTH * 2
+        inner_right = width - BORDER_WIDTH * 2
+        inner_top = BORDER_WIDTH * 2
+        inner_bottom = height - BORDER_WIDTH * 2
+
+        available_w = max(10, inner_right - inner_left)
+        available_h = max(10, inner_bottom - inner_top)
+
+        chars_per_line = max(1, math.ceil(n / line_count))
+        # 한 줄당 허용 문자수(가로방향) 계산
+        max_chars_fit = max(1, int(available_w / (max_w * 1.05))) if max_w > 0 else chars_per_line  # 5% 여유
+        if max_chars_fit < chars_per_line:
+            chars_per_line = max_chars_fit
+
+        idx = 0
+        for row in range(line_count):
+            if idx >= n:
+                break
+            this_count = min(chars_per_line, n - idx)
+            if this_count == 1:
+                gap = 0
+            else:
+                gap = available_w / (this_count - 1)
+                gap = max(gap, max_w * 1.05)
+            y_center = inner_top + row * (available_h / line_count) + (available_h / line_count) / 2
+            total_row_width = (this_count - 1) * gap if this_count > 1 else max_w
+            start_x = inner_left + (available_w - total_row_width) / 2
+            for i in range(this_count):
+                ch = text[idx]
+                x_center = start_x + i * gap
+                w, h = metrics.size(ch)
+                placed.append((ch, x_center - w/2, y_center - h/2, 0.0))
+                idx += 1
+
+    elif shape == "직사각(세로)":
+        inner_left = BORDER_WIDTH * 2
+        inner_right = width - BORDER_WIDTH * 2
+        inner_top = BORDER_WIDTH * 2
+        inner_bottom = height - BORDER_WIDTH * 2
+
+        available_w = max(10, inner_right - inner_left)
+        available_h = max(10, inner_bottom - inner_top)
+
+        cols = line_count
+        chars_per_col = max(1, math.ceil(n / cols))
+        # 세로에 맞게 fit 행수 계산
+        max_rows_fit = max(1, int(available_h / (max_h * 1.05))) if max_h > 0 else chars_per_col
+        if chars_per_col > max_rows_fit:
+            chars_per_col = max_rows_fit
+
+        idx = 0
+        col_w = available_w / cols
+        for col in range(cols):
+            if idx >= n:
+                break
+            this_count = min(chars_per_col, n - idx)
+            if this_count == 1:
+                vgap = 0
+            else:
+                vgap = available_h / (this_count - 1)
+                vgap = max(vgap, max_h * 1.05)
+            x_center = inner_left + col * col_w + col_w / 2
+            total_col_height = (this_count - 1) * vgap if this_count > 1 else max_h
+            start_y = inner_top + (available_h - total_col_height) / 2
+            for r in range(this_count):
+                ch = text[idx]
+                y_center = start_y + r * vgap
+                w, h = metrics.size(ch)
+                placed.append((ch, x_center - w/2, y_center - h/2, 0.0))
+                idx += 1
+
+    return placed
+
+def layout_fits(text, placed, metrics, width, height):
+    """
+    모든 글자가 배치되었고, 잉크 영역(bbox)이 캔버스 안에 있으며 서로 겹치지 않으면 True
+    회전한 글자는 잉크 영역을 실제로 돌린 사각형끼리 분리축 검사로 판정합니다.
+    """
+    if len(placed) != len(text):
+        return False
+    quads = []
+    for ch, x, y, rot in placed:
+        l, t, r, b = metrics.bbox(ch)
+        corners = _rotated_corners((x + l, y + t, x + r, y + b), rot)
+        xs = [p[0] for p in corners]
+        ys = [p[1] for p in corners]
+        box = (min(xs), min(ys), max(xs), max(ys))
+        if box[0] < 0 or box[1] < 0 or box[2] > width or box[3] > height:
+            return False
+        quads.append((box, corners if rot else None))
+    # 글자 수가 적으므로(최대 수십 자) 모든 쌍을 직접 비교
+    for i in range(len(quads)):
+        a, a_corners = quads[i]
+        for j in range(i + 1, len(quads)):
+            b, b_corners = quads[j]
+            if not (a[0] < b[2] and b[0] < a[2] and a[1] < b[3] and b[1] < a[3]):
+                continue
+            # 감싸는 상자가 겹쳐도 돌린 사각형 사이에는 틈이 있을 수 있음 (둘레 배치에서 흔함)
+            if a_corners is None and b_corners is None:
+                return False
+            if not _separated(a_corners or _rotated_corners(a, 0), b_corners or _rotated_corners(b, 0)):
+                return False
+    return True
+
+def _rotated_corners(box, rot):
+    """box 를 중심 기준으로 rot 도(반시계, Image.rotate 와 같은 방향) 돌린 네 꼭짓점 (둘레 순서)"""
+    l, t, r, b = box
+    corners = ((l, t), (r, t), (r, b), (l, b))
+    if not rot:
+        return corners
+    rad = math.radians(rot)
+    c, s = math.cos(rad), math.sin(rad)
+    mx, my = (l + r) / 2, (t + b) / 2
+    # y 축이 아래로 향하는 이미지 좌표에서 화면상 반시계 회전
+    return tuple((mx + (px - mx) * c + (py - my) * s, my - (px - mx) * s + (py - my) * c)
+                 for px, py in corners)
+
+def _separated(p, q):
+    """두 볼록 사각형(꼭짓점 둘레 순서) 사이에 분리축이 있으면 True. 변이 닿기만 하는 것은 분리로 봄"""
+    for corners in (p, q):
+        for k in (0, 1):
+            ax = corners[k + 1][0] - corners[k][0]
+            ay = corners[k + 1][1] - corners[k][1]
+            pa = [x * ax + y * ay for x, y in p]
+            qa = [x * ax + y * ay for x, y in q]
+            if max(pa) <= min(qa) or max(qa) <= min(pa):
+                return True
+    return False
+
+def fit_font_size(text, font_path, base_font_size, width, height, shape, line_count=1, line_spacing=1.0,
+                  rotate=False, fallback=None):
+    """
+    base_font_size 이하에서 도형/줄 수/줄간격에 맞게 겹침 없이 들어가는 가장 큰 폰트 크기를 찾습니다.
+    fallback: 대체 폰트로 그릴 글자 {글자: 폰트 경로} (fallback_fonts_for 결과)
+    크기별 폰트 객체와 측정값은 캐시되어 있으므로 이분 탐색으로 log2(base_font_size) 번 정도만 로딩합니다.
+    어떤 크기도 맞지 않으면 MIN_FIT_FONT_SIZE 를 돌려줍니다.
+    """
+    shape = normalize_shape(shape)
+    line_count = clamp_line_count(line_count)
+
+    def fits(size):
+        metrics = metrics_with_fallback(font_path, size, fallback)
+        placed = layout_text_to_stamp_shape(text, metrics, width, height, shape, line_count, line_spacing,
+                                            rotate)
+        return layout_fits(text, placed, metrics, width, height)
+
+    hi = max(MIN_FIT_FONT_SIZE, int(base_font_size))
+    if fits(hi):
+        return hi
+    lo = MIN_FIT_FONT_SIZE
+    hi -= 1
+    # 불변식: lo 는 (맞거나 최소값), hi 보다 큰 크기는 맞지 않음
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if fits(mid):
+            lo = mid
+        else:
+            hi = mid - 1
+    return lo
+
+# --- 도장 기본 텍스트 배치 함수들 ---
+def layout_text_left_to_right(text, font, width, height, metrics=None, fallback=None):
+    # 도장 중앙에 좌->우 방향 텍스트 배치 (문자열 전체를 한 덩어리로)
+    if fallback:
+        return _layout_runs_left_to_right(text, metrics, width, height, fallback)
+    w, h = get_glyph_metrics(font).size(text)
+    x = (width - w) // 2
+    y = (height - h) // 2
+    return [(text, x, y)]
+
+def _layout_runs_left_to_right(text, metrics, width, height, fallback):
+    # 대체 폰트가 섞이면 같은 폰트로 그릴 글자끼리 묶어(run) 차례로 이어 붙임
+    runs = ["".join(group) for _, group in groupby(text, key=lambda ch: fallback.get(ch))]
+    total_w = sum(metrics.advance(run) for run in runs)
+    h = max(metrics.size(run)[1] for run in runs)
+    x = (width - total_w) // 2
+    y = (height - h) // 2
+    placed = []
+    for run in runs:
+        placed.append((run, x, y))
+        x += metrics.advance(run)
+    return placed
+
+def layout_text_top_to_bottom(text, font, width, height, metrics=None):
+    # 도장 중앙에 상->하 방향 텍스트 배치
+    metrics = metrics or get_glyph_metrics(font)
+    total_height = 0
+    char_sizes = []
+    for ch in text:
+        w, h = metrics.size(ch)
+        char_sizes.append((w, h))
+        total_height += h
+    y = (height - total_height) // 2
+    x = width // 2
+    placed = []
+    for i, ch in enumerate(text):
+        w, h = char_sizes[i]
+        placed.append((ch, x - w//2, y))
+        y += h
+    return placed
+
+def layout_text_joseon_style(text, font, width, height, metrics=None):
+    # 조선체 스타일 (약간 왼쪽 정렬 좌->우, 세로 간격 넉넉히)
+    metrics = metrics or get_glyph_metrics(font)
+    x = BORDER_WIDTH*3
+    try:
+        y = (height - len(text) * font.size) // 2
+    except Exception:
+        y = (height - len(text) * 12) // 2
+    placed = []
+    for ch in text:
+        w, h = metrics.size(ch)
+        placed.append((ch, x, y))
+        y += h + 2
+    return placed
+
+# --- 둥근 사각형 그리기 보조 함수 ---
+def draw_rounded_rectangle(draw, box, radius, outline, width):
+    left, top, right, bottom = box
+    draw.line([(left+radius, top), (right-radius, top)], fill=outline, width=width)
+    draw.line([(left+radius, bottom), (right-radius, bottom)], fill=outline, width=width)
+    draw.line([(left, top+radius), (left, bottom-radius)], fill=outline, width=width)
+    draw.line([(right, top+radius), (right, bottom-radius)], fill=outline, width=width)
+    draw.arc([left, top, left+2*radius, top+2*radius], 180, 270, fill=outline, width=width)
+    draw.arc([right-2*radius, top, right, top+2*radius], 270, 360, fill=outline, width=width)
+    draw.arc([right-2*radius, bottom-2*radius, right, bottom], 0, 90, fill=outline, width=width)
+    draw.arc([left, bottom-2*radius, left+2*radius, bottom], 90, 180, fill=outline, width=width)
+
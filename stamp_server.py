@@ -0,0 +1,274 @@
+"""
+도장 렌더링 HTTP 서버 (로컬 도구용).
+
+    python stamp_server.py --port 8765
+    GET /stamp?text=홍길동&type=원형&size=400x400&color=%23FF0000
+    GET /stats
+
+쿼리 이름은 stamp_batch 의 열 이름과 같고(text, font, font_size, size, stamp_type, sub_shape, direction,
+line_count, line_spacing, color, rotate_glyphs, ink_effect, ink_seed),
+줄임말 type / shape / lines / spacing / rotate / ink / seed 도 받습니다.
+그 밖에 format(png/webp), mode(RGBA/P/LA), scale.
+font 는 폰트 목록/레지스트리의 표시 이름만 받습니다 (서버가 아무 파일이나 폰트로 읽지 않도록).
+
+렌더링은 크기가 정해진 작업 스레드 풀에서 하고, 같은 요청이 동시에 여러 개 오면 한 번만 렌더링해
+결과를 나눠 줍니다. 대기 중인 렌더링이 --queue 를 넘으면 503 으로 바로 거절합니다.
+응답에는 spec 해시로 만든 ETag 와 Cache-Control 이 붙고, If-None-Match 가 맞으면 렌더링 없이 304 입니다.
+"""
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from threading import Lock
+from urllib.parse import parse_qs, urlsplit
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+
+from stamp_batch import spec_from_row
+from stamp_cache import get_render_cache, spec_hash
+from stamp_export import PNG_MODES, encode_raster, mask_to_image
+from stamp_render import scaled_size
+
+# 인코딩된 응답 본문 LRU (같은 도장을 반복 요청할 때 렌더링/인코딩 모두 건너뜀)
+RESPONSE_CACHE_BYTES = 32 * 1024 * 1024
+# 지연 시간 통계에 쓰는 최근 요청 수
+LATENCY_WINDOW = 1024
+# 한 변 최대 픽셀 (큰 인쇄물은 stamp_export.export_large_png 로)
+MAX_SIDE = 4000
+QUERY_ALIASES = {"type": "stamp_type", "shape": "sub_shape", "lines": "line_count",
+                 "spacing": "line_spacing", "rotate": "rotate_glyphs", "ink": "ink_effect", "seed": "ink_seed"}
+CONTENT_TYPES = {"PNG": "image/png", "WEBP": "image/webp"}
+
+class ServerBusy(Exception):
+    """대기 중인 렌더링이 가득 참 (503)"""
+
+def request_from_query(query):
+    """쿼리 문자열 -> (StampSpec, 형식, 색상 모드, 배율). 값이 잘못되면 ValueError"""
+    row = {QUERY_ALIASES.get(k, k): v[-1] for k, v in parse_qs(query).items()}
+    color = row.get("color", "")
+    # URL 에서 # 을 빼먹은 "FF0000" 도 받음
+    if color and color[0] != "#" and len(color) in (3, 6) and all(c in "0123456789abcdefABCDEF" for c in color):
+        row["color"] = "#" + color
+    # 글자 크기/줄 수/줄간격 범위도 여기서 확인됨 (큰 글자 크기는 거대한 글자 마스크를 만듦)
+    _, spec = spec_from_row(row)
+    fmt = row.get("format", "png").upper()
+    if fmt not in CONTENT_TYPES:
+        raise ValueError(f"지원하지 않는 형식: {fmt}")
+    mode = row.get("mode", "RGBA").upper()
+    if mode not in PNG_MODES:
+        raise ValueError(f"지원하지 않는 색상 모드: {mode}")
+    scale = float(row.get("scale", 1.0))
+    if scale <= 0 or max(scaled_size(spec, scale)) > MAX_SIDE:
+        raise ValueError(f"출력 크기는 한 변 {MAX_SIDE} 픽셀 이하여야 합니다")
+    return spec, fmt, mode, scale
+
+def response_key(spec, fmt, mode, scale):
+    """응답 본문을 결정하는 모든 입력의 해시. ETag 와 동시 요청 합치기 키로 씀"""
+    payload = f"{spec_hash(spec, scale)}|{spec.color}|{fmt}|{mode}"
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+class StampService:
+    """
+    렌더링 풀 + 동시 요청 합치기 + 응답 캐시. 스레드 안전합니다.
+    cache: 마스크를 보관할 RenderCache (기본: get_render_cache())
+    """
+
+    def __init__(self, workers=None, max_queue=None, cache=None, compress_level=6,
+                 response_bytes=RESPONSE_CACHE_BYTES):
+        self.workers = workers or os.cpu_count() or 1
+        self.max_queue = max_queue or self.workers * 16
+        self.cache = cache or get_render_cache()
+        self.compress_level = compress_level
+        self.response_bytes = response_bytes
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="render")
+        self._lock = Lock()
+        self._inflight = {}
+        self._responses = OrderedDict()
+        self._responses_used = 0
+        self._queued = 0
+        self._active = 0
+        self._latency = deque(maxlen=LATENCY_WINDOW)
+        self.stats = {"requests": 0, "not_modified": 0, "response_hits": 0, "coalesced": 0,
+                      "renders": 0, "rejected": 0, "errors": 0}
+
+    # --- 응답 캐시 ---
+    def _response_get(self, key):
+        data = self._responses.get(key)
+        if data is not None:
+            self._responses.move_to_end(key)
+        return data
+
+    def _response_put(self, key, data):
+        if key in self._responses:
+            return
+        self._responses[key] = data
+        self._responses_used += len(data)
+        while self._responses_used > self.response_bytes and len(self._responses) > 1:
+            _, old = self._responses.popitem(last=False)
+            self._responses_used -= len(old)
+
+    # --- 렌더링 ---
+    def _render(self, key, spec, fmt, mode, scale):
+        with self._lock:
+            self._queued -= 1
+            self._active += 1
+        try:
+            mask = self.cache.render_mask(spec, scale)
+            img = mask_to_image(mask, spec.color, mode if fmt == "PNG" else "RGBA")
+            data = encode_raster(img, fmt, self.compress_level)
+            with self._lock:
+                self.stats["renders"] += 1
+                self._response_put(key, data)
+            return data
+        finally:
+            with self._lock:
+                self._active -= 1
+                self._inflight.pop(key, None)
+
+    def get(self, key, spec, fmt="PNG", mode="RGBA", scale=1.0):
+        """key(response_key) 의 응답 본문. 같은 key 가 렌더링 중이면 그 결과를 기다림"""
+        with self._lock:
+            data = self._response_get(key)
+            if data is not None:
+                self.stats["response_hits"] += 1
+                return data
+            future = self._inflight.get(key)
+            if future is not None:
+                self.stats["coalesced"] += 1
+            else:
+                if self._queued >= self.max_queue:
+                    self.stats["rejected"] += 1
+                    raise ServerBusy()
+                self._queued += 1
+                future = self._pool.submit(self._render, key, spec, fmt, mode, scale)
+                self._inflight[key] = future
+        return future.result()
+
+    def record(self, ms, status):
+        with self._lock:
+            self.stats["requests"] += 1
+            if status == 304:
+                self.stats["not_modified"] += 1
+            elif status >= 500 and status != 503:
+                self.stats["errors"] += 1
+            self._latency.append(ms)
+
+    def snapshot(self):
+        """/stats 응답: 누적 횟수, 현재 대기/처리 중 수, 최근 요청 지연 시간(ms)"""
+        with self._lock:
+            latency = sorted(self._latency)
+            result = dict(self.stats)
+            result.update(queue_depth=self._queued, active=self._active, inflight=len(self._inflight),
+                          workers=self.workers, max_queue=self.max_queue,
+                          response_cache_kb=round(self._responses_used / 1024, 1))
+        if latency:
+            result["latency_ms"] = {
+                "mean": round(sum(latency) / len(latency), 3),
+                "p50": round(latency[len(latency) // 2], 3),
+                "p95": round(latency[min(len(latency) - 1, int(len(latency) * 0.95))], 3),
+                "max": round(latency[-1], 3),
+            }
+        result["render_cache"] = self.cache.stats_snapshot()
+        return result
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+# --- HTTP ---
+class StampRequestHandler(BaseHTTPRequestHandler):
+    # keep-alive 로 연결을 재사용 (모든 응답에 Content-Length 를 붙임)
+    protocol_version = "HTTP/1.1"
+    service = None
+    max_age = 86400
+    quiet = True
+
+    def do_GET(self):
+        started = time.perf_counter()
+        status = 500
+        try:
+            url = urlsplit(self.path)
+            if url.path == "/stamp":
+                status = self._stamp(url.query)
+            elif url.path == "/stats":
+                status = self._send(200, json.dumps(self.service.snapshot(), ensure_ascii=False).encode("utf-8"),
+                                    "application/json; charset=utf-8")
+            else:
+                status = self._send_error(404, "없는 경로입니다. /stamp?text=... 또는 /stats")
+        finally:
+            self.service.record((time.perf_counter() - started) * 1000, status)
+
+    def _stamp(self, query):
+        try:
+            spec, fmt, mode, scale = request_from_query(query)
+        except (ValueError, KeyError) as e:
+            return self._send_error(400, f"입력값 오류: {e}")
+        key = response_key(spec, fmt, mode, scale)
+        etag = f'"{key}"'
+        headers = {"ETag": etag, "Cache-Control": f"public, max-age={self.max_age}"}
+        if etag in (t.strip() for t in self.headers.get("If-None-Match", "").split(",")):
+            return self._send(304, b"", None, headers)
+        try:
+            data = self.service.get(key, spec, fmt, mode, scale)
+        except ServerBusy:
+            return self._send_error(503, "렌더링 대기열이 가득 찼습니다", {"Retry-After": "1"})
+        except ValueError as e:
+            return self._send_error(400, f"렌더링 실패: {e}")
+        except Exception as e:
+            return self._send_error(500, f"렌더링 실패: {e}")
+        return self._send(200, data, CONTENT_TYPES[fmt], headers)
+
+    def _send(self, status, body, content_type, headers=None):
+        self.send_response(status)
+        if content_type:
+            self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        if body:
+            self.wfile.write(body)
+        return status
+
+    def _send_error(self, status, message, headers=None):
+        return self._send(status, (message + "\n").encode("utf-8"), "text/plain; charset=utf-8", headers)
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+def make_server(host="127.0.0.1", port=8765, service=None, max_age=86400, quiet=True):
+    """ThreadingHTTPServer 를 만들어 돌려줍니다 (serve_forever() 는 호출하는 쪽에서)"""
+    handler = type("Handler", (StampRequestHandler,),
+                   {"service": service or StampService(), "max_age": max_age, "quiet": quiet})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="도장 렌더링 HTTP 서버")
+    parser.add_argument("--host", default="127.0.0.1", help="바인드 주소 (기본: 이 컴퓨터에서만)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--workers", type=int, help="렌더링 스레드 수 (기본: CPU 수)")
+    parser.add_argument("--queue", type=int, help="대기 중인 렌더링 최대 수, 넘으면 503 (기본: 작업 수 x 16)")
+    parser.add_argument("--compress-level", type=int, default=6, choices=range(10), metavar="0-9")
+    parser.add_argument("--max-age", type=int, default=86400, help="Cache-Control max-age (초)")
+    parser.add_argument("--verbose", action="store_true", help="요청마다 로그 출력")
+    args = parser.parse_args(argv)
+
+    service = StampService(args.workers, args.queue, compress_level=args.compress_level)
+    server = make_server(args.host, args.port, service, args.max_age, quiet=not args.verbose)
+    print(f"http://{args.host}:{server.server_port}/stamp?text=... (작업 {service.workers}개)", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
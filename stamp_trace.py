@@ -0,0 +1,155 @@
+"""
+렌더링 단계별 시간/메모리 계측.
+
+    with span("layout"):
+        ...
+
+꺼져 있으면 span() 은 아무것도 하지 않는 공유 객체를 돌려주므로 비용이 거의 없습니다.
+켜져 있으면 스레드마다 span 을 중첩해서 기록하고, 가장 바깥 span 이 끝날 때 한 건의 기록(trace)으로 묶어
+최근 기록에 보관하며, 파일을 지정했으면 JSON 한 줄로 덧붙입니다.
+
+환경변수 STAMP_TRACE=<파일 경로> 로 시작부터 켜고, STAMP_TRACE_MEMORY=1 이면 tracemalloc 최대치도 기록합니다.
+"""
+from collections import deque
+from threading import Lock, current_thread, local
+import json
+import os
+import time
+import tracemalloc
+
+# 최근 기록 보관 개수 (상태 표시줄 등에서 조회)
+RECENT_TRACES = 64
+
+_enabled = False
+_memory = False
+_trace_file = None
+_lock = Lock()
+_local = local()
+_recent = deque(maxlen=RECENT_TRACES)
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+class _Span:
+    __slots__ = ("name", "start", "entry", "entries")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        if stack:
+            # 안쪽 span 은 시작 순서대로 바깥 span 의 목록에 [이름, 깊이, ms] 로 기록
+            self.entries = stack[0].entries
+            self.entry = [self.name, len(stack), None]
+            self.entries.append(self.entry)
+        else:
+            self.entries = []
+            self.entry = None
+            if _memory and tracemalloc.is_tracing():
+                tracemalloc.reset_peak()
+        stack.append(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        ms = (time.perf_counter() - self.start) * 1000
+        stack = _local.stack
+        stack.pop()
+        if self.entry is not None:
+            self.entry[2] = round(ms, 3)
+        else:
+            _finish(self, ms, exc_type is not None)
+        return False
+
+def span(name):
+    """이름 붙은 구간. with 문으로 사용"""
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name)
+
+def _finish(root, ms, failed):
+    record = {
+        "name": root.name,
+        "ms": round(ms, 3),
+        "ts": round(time.time(), 3),
+        "thread": current_thread().name,
+        "spans": [{"name": n, "depth": d, "ms": m} for n, d, m in root.entries],
+    }
+    if failed:
+        record["error"] = True
+    if _memory and tracemalloc.is_tracing():
+        record["peak_kb"] = round(tracemalloc.get_traced_memory()[1] / 1024, 1)
+    with _lock:
+        _recent.append(record)
+        if _trace_file is not None:
+            _trace_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            _trace_file.flush()
+
+# --- 켜기/끄기 ---
+def enable(path=None, memory=False):
+    """
+    계측을 켭니다. path 를 주면 기록을 JSON lines 로 덧붙이고,
+    memory 면 tracemalloc 을 시작해 바깥 span 마다 파이썬 힙 최대치를 기록합니다 (느려짐).
+    """
+    global _enabled, _memory, _trace_file
+    with _lock:
+        if path and _trace_file is None:
+            _trace_file = open(path, "a", encoding="utf-8")
+    if memory and not tracemalloc.is_tracing():
+        tracemalloc.start()
+    _memory = memory
+    _enabled = True
+
+def disable():
+    global _enabled, _memory, _trace_file
+    _enabled = False
+    if _memory and tracemalloc.is_tracing():
+        tracemalloc.stop()
+    _memory = False
+    with _lock:
+        if _trace_file is not None:
+            _trace_file.close()
+            _trace_file = None
+
+def is_enabled():
+    return _enabled
+
+# --- 조회 ---
+def recent_traces():
+    with _lock:
+        return list(_recent)
+
+def last_trace(name=None):
+    """가장 최근 기록 (name 을 주면 그 이름의 바깥 span 중 가장 최근)"""
+    with _lock:
+        for record in reversed(_recent):
+            if name is None or record["name"] == name:
+                return record
+    return None
+
+def summarize(record):
+    """'preview 12.3ms (layout 3.1 · draw_glyphs 5.2)' 형식 한 줄. 바로 안쪽 단계를 이름별로 합산"""
+    totals = {}
+    for s in record["spans"]:
+        if s["depth"] == 1 and s["ms"] is not None:
+            totals[s["name"]] = totals.get(s["name"], 0.0) + s["ms"]
+    text = f'{record["name"]} {record["ms"]:.1f}ms'
+    if totals:
+        text += " (" + " · ".join(f"{n} {ms:.1f}" for n, ms in totals.items()) + ")"
+    if "peak_kb" in record:
+        text += f' peak {record["peak_kb"]:.0f}KB'
+    return text
+
+if os.environ.get("STAMP_TRACE"):
+    enable(os.environ["STAMP_TRACE"], memory=os.environ.get("STAMP_TRACE_MEMORY") == "1")